@@ -0,0 +1,32 @@
+"""
+Benchmarks, to track performance changes over time. Run them from the "src" directory, e.g.:
+
+    python -m benchmarks.view_templates
+
+They do not require any env config nor external services. Anything missing is filled in with dummy values.
+"""
+import os
+
+
+def setup_django():
+    """Bootstraps Django using dummy config for anything not set in env."""
+    for key, value in {
+        "DJANGO_SETTINGS_MODULE": "botmydesk.settings",
+        "DJANGO_SECRET_KEY": "benchmark",
+        "DJANGO_ALLOWED_HOST": "localhost",
+        "DJANGO_DATABASE_ENGINE": "django.db.backends.sqlite3",
+        "DJANGO_DATABASE_NAME": ":memory:",
+        "DJANGO_TIMEZONE": "UTC",
+        "SLACK_BOT_TOKEN": "xoxb-benchmark",
+        "SLACK_BOT_SIGNING_SECRET": "benchmark",
+        "SLACK_SLASHCOMMAND_BMD": "/bmd",
+        "BOOKMYDESK_API_URL": "http://localhost",
+        "BOOKMYDESK_CLIENT_ID": "benchmark",
+        "BOOKMYDESK_CLIENT_SECRET": "benchmark",
+        "CELERY_BROKER_URL": "memory://",
+    }.items():
+        os.environ.setdefault(key, value)
+
+    import django
+
+    django.setup()
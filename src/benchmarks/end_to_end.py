@@ -0,0 +1,286 @@
+"""
+End-to-end throughput of the main paths, for N synthetic users, against fake BookMyDesk and Slack backends. E.g.:
+
+    python -m benchmarks.end_to_end --users 100 --latency-ms 20 --error-rate 0.01
+
+Time is frozen at noon on the most recent Wednesday, so notifications are dispatched no matter when this is run. Exits
+non-zero if any path failed, as its timings would be meaningless.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import traceback
+from typing import Callable
+from unittest import mock
+from urllib.parse import urlencode
+
+from benchmarks import setup_django
+from benchmarks.fake_backends import FakeBookMyDesk, FakeSlack
+
+
+SIGNING_SECRET = "benchmark"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--messages-per-channel", type=int, default=2)
+    arguments = parser.parse_args()
+
+    # A file, as an in-memory database is not shared with any other threads.
+    database_file = tempfile.NamedTemporaryFile(suffix=".sqlite3")
+    os.environ["DJANGO_DATABASE_NAME"] = database_file.name
+    os.environ["SLACK_BOT_SIGNING_SECRET"] = SIGNING_SECRET
+    setup_django()
+
+    from django.core.management import call_command
+    from django.test.utils import override_settings
+    from django.utils import timezone
+
+    backend_options = {
+        "latency": arguments.latency_ms / 1000,
+        "error_rate": arguments.error_rate,
+    }
+    frozen_now = _most_recent_wednesday_noon(timezone.now())
+
+    with FakeBookMyDesk(**backend_options) as bookmydesk, FakeSlack(
+        user_count=arguments.users,
+        messages_per_channel=arguments.messages_per_channel,
+        **backend_options,
+    ) as slack, override_settings(
+        BOOKMYDESK_API_URL=bookmydesk.url,
+        SLACK_API_URL=f"{slack.url}/api/",
+        ALLOWED_HOSTS=["testserver"],
+        # Measures our own overhead, rather than the rate limit of the bulk tasks.
+        BOTMYDESK_BOOKMYDESK_RATE_LIMIT=1_000_000,
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        },
+    ), mock.patch(
+        "django.utils.timezone.now", return_value=frozen_now
+    ):
+        call_command("migrate", verbosity=0)
+        botmydesk_users = _create_users(arguments.users)
+
+        # Logging would only measure the console here.
+        logging.disable(logging.CRITICAL)
+
+        print(
+            f"{arguments.users} users, {arguments.latency_ms} ms latency, {arguments.error_rate:.0%} errors"
+        )
+        print(
+            f"{'path':<36} {'total s':>8} {'ms/user':>8} {'users/s':>8} {'BMD calls':>9} {'Slack calls':>11} {'errors':>6}"
+        )
+
+        failed_names = []
+
+        for name, prepare, run in _scenarios(botmydesk_users):
+            prepare()
+            bookmydesk.reset_counts()
+            slack.reset_counts()
+            start = time.perf_counter()
+
+            try:
+                run()
+            except Exception:
+                failed_names.append(name)
+                print(f"{name:<36} FAILED", file=sys.stderr)
+                traceback.print_exc()
+                continue
+
+            duration = time.perf_counter() - start
+            print(
+                f"{name:<36} {duration:>8.2f} {duration / len(botmydesk_users) * 1000:>8.1f} "
+                f"{len(botmydesk_users) / duration:>8.1f} {bookmydesk.request_count:>9} "
+                f"{slack.request_count:>11} {bookmydesk.error_count + slack.error_count:>6}"
+            )
+
+    if failed_names:
+        sys.exit(f"Failed: {', '.join(failed_names)}")
+
+
+def _scenarios(botmydesk_users: list) -> list:
+    """Name, preparation (not measured) and the path measured."""
+    from django.core.cache import cache
+    from django.test import Client
+
+    from bmd_core.models import BotMyDeskUser
+    from botmydesk.celery import app
+    import bmd_core.tasks
+
+    client = Client()
+
+    def post_for_every_user(path: str, build_body: Callable, content_type: str):
+        def run():
+            for current in botmydesk_users:
+                body = build_body(current)
+                client.post(
+                    path,
+                    data=body,
+                    content_type=content_type,
+                    **_signature_headers(body),
+                )
+
+        return run
+
+    def eagerly(run: Callable) -> Callable:
+        """Runs any tasks scheduled inline, so the work done in the background is measured as well."""
+
+        def run_eagerly():
+            app.conf.task_always_eager = True
+
+            try:
+                run()
+            finally:
+                app.conf.task_always_eager = False
+
+        return run_eagerly
+
+    def reset_notifications():
+        BotMyDeskUser.objects.update(last_notification_sent=None)
+
+    def reset_app_homes():
+        cache.clear()
+        BotMyDeskUser.objects.update(
+            app_home_rendered_at=None, app_home_published_hash=None
+        )
+
+    return [
+        (
+            "dispatch_botmydesk_notifications",
+            reset_notifications,
+            bmd_core.tasks.dispatch_botmydesk_notifications,
+        ),
+        (
+            "sync_botmydesk_app_homes (changed)",
+            reset_app_homes,
+            bmd_core.tasks.sync_botmydesk_app_homes,
+        ),
+        (
+            "sync_botmydesk_app_homes (unchanged)",
+            lambda: None,
+            bmd_core.tasks.sync_botmydesk_app_homes,
+        ),
+        (
+            "purge_old_messages",
+            lambda: None,
+            bmd_core.tasks.purge_old_messages,
+        ),
+        (
+            "POST hooks/slack/event (+ task)",
+            reset_app_homes,
+            eagerly(
+                post_for_every_user(
+                    "/hooks/slack/event",
+                    lambda x: json.dumps(
+                        {
+                            "type": "event_callback",
+                            "event": {
+                                "type": "app_home_opened",
+                                "user": x.slack_user_id,
+                                "tab": "home",
+                            },
+                        }
+                    ),
+                    "application/json",
+                )
+            ),
+        ),
+        (
+            "POST hooks/slack/slashcommand",
+            cache.clear,
+            post_for_every_user(
+                "/hooks/slack/slashcommand",
+                lambda x: urlencode(
+                    {
+                        "command": "/bmd",
+                        "text": "status",
+                        "user_id": x.slack_user_id,
+                        "trigger_id": "trigger",
+                    }
+                ),
+                "application/x-www-form-urlencoded",
+            ),
+        ),
+        (
+            "POST hooks/slack/interactivity",
+            cache.clear,
+            post_for_every_user(
+                "/hooks/slack/interactivity",
+                lambda x: urlencode(
+                    {
+                        "payload": json.dumps(
+                            {
+                                "type": "block_actions",
+                                "user": {"id": x.slack_user_id},
+                                "actions": [{"value": "mark_working_from_home_today"}],
+                                "container": {
+                                    "channel_id": x.slack_user_id,
+                                    "message_ts": "1.0",
+                                },
+                            }
+                        )
+                    }
+                ),
+                "application/x-www-form-urlencoded",
+            ),
+        ),
+    ]
+
+
+def _create_users(count: int) -> list:
+    from django.utils import timezone
+
+    from bmd_core.models import AccessListEntry, BotMyDeskUser
+
+    notification_time = timezone.datetime(2000, 1, 1, hour=9).time()
+    botmydesk_users = BotMyDeskUser.objects.bulk_create(
+        BotMyDeskUser(
+            slack_user_id=f"U{x}",
+            slack_email=f"user{x}@example.com",
+            slack_name=f"User {x}",
+            slack_tz="Europe/Amsterdam",
+            bookmydesk_access_token=f"token-{x}",
+            bookmydesk_access_token_expires_at=timezone.now()
+            + timezone.timedelta(days=365),
+            bookmydesk_refresh_token=f"refresh-{x}",
+            preferred_notification_time_on_wednesdays=notification_time,
+            prefer_only_notifications_when_needed=False,
+        )
+        for x in range(count)
+    )
+    AccessListEntry.objects.bulk_create(
+        AccessListEntry(slack_user_id=x.slack_user_id, access=AccessListEntry.ALLOW)
+        for x in botmydesk_users
+    )
+
+    return botmydesk_users
+
+
+def _signature_headers(body: str) -> dict:
+    from slack_sdk.signature import SignatureVerifier
+
+    timestamp = str(int(time.time()))
+    return {
+        "HTTP_X_SLACK_REQUEST_TIMESTAMP": timestamp,
+        "HTTP_X_SLACK_SIGNATURE": SignatureVerifier(SIGNING_SECRET).generate_signature(
+            timestamp=timestamp, body=body
+        ),
+    }
+
+
+def _most_recent_wednesday_noon(now):
+    from django.utils import timezone
+
+    noon = now.replace(hour=12, minute=0, second=0, microsecond=0)
+    return noon - timezone.timedelta(days=(now.weekday() - 2) % 7)
+
+
+if __name__ == "__main__":
+    main()
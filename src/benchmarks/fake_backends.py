@@ -0,0 +1,257 @@
+"""
+Local stand-ins for the BookMyDesk API and the Slack Web API, for benchmarking without any external services.
+Both serve synthetic data for any number of users and can simulate latency and errors.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeBackend:
+    """Serves requests in a background thread. Use as context manager."""
+
+    def __init__(self, latency: float = 0, error_rate: float = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.request_count = 0
+        self.error_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeBackend":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counts(self):
+        with self._lock:
+            self.request_count = self.error_count = 0
+
+    def handle(
+        self, method: str, path: str, query: dict, body: dict, headers: dict
+    ) -> Tuple[int, dict]:
+        """Returns the HTTP status code and JSON response body."""
+        raise NotImplementedError()
+
+    def error_response(self) -> Tuple[int, dict]:
+        raise NotImplementedError()
+
+    def _handler_class(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._respond()
+
+            def do_POST(self):
+                self._respond()
+
+            def do_DELETE(self):
+                self._respond()
+
+            def log_message(self, *_):
+                pass  # Silence
+
+            def _respond(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                content = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                body = _decode_body(content, self.headers.get("Content-Type", ""))
+
+                if backend.latency:
+                    time.sleep(backend.latency)
+
+                with backend._lock:
+                    backend.request_count += 1
+                    failed = random.random() < backend.error_rate
+                    backend.error_count += int(failed)
+
+                if failed:
+                    status_code, response = backend.error_response()
+                else:
+                    status_code, response = backend.handle(
+                        self.command, url.path, query, body, self.headers
+                    )
+
+                payload = json.dumps(response).encode() if response is not None else b""
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+class FakeBookMyDesk(FakeBackend):
+    """
+    Users are identified by their access token, e.g. "token-7" for user 7.
+    Every user has a few reservations per day, alternating between home and office reservations.
+    """
+
+    def __init__(self, reservations_per_day: int = 1, **kwargs):
+        super().__init__(**kwargs)
+        self.reservations_per_day = reservations_per_day
+
+    def error_response(self) -> Tuple[int, dict]:
+        return 500, {"message": "Simulated error"}
+
+    def handle(
+        self, method: str, path: str, query: dict, body: dict, headers: dict
+    ) -> Tuple[int, dict]:
+        user_number = headers.get("Authorization", "").rsplit("-", 1)[-1]
+
+        if path == "/token":
+            return 200, {"access_token": "token-0", "refresh_token": "refresh-0"}
+
+        if path == "/v3/me":
+            return 200, {
+                "result": {
+                    "id": f"bmd-user-{user_number}",
+                    "firstName": "Bench",
+                    "infix": "",
+                    "lastName": f"Mark {user_number}",
+                    "companies": [{"id": "company-1"}],
+                }
+            }
+
+        if path == "/v3/companyExtended":
+            return 200, {
+                "result": {
+                    "company": {
+                        "id": "company-1",
+                        "locations": [
+                            {
+                                "id": "location-1",
+                                "name": "Office",
+                                "maps": [
+                                    {"id": "map-1", "name": "Floor 1", "seats": []}
+                                ],
+                            }
+                        ],
+                    }
+                }
+            }
+
+        if path == "/v3/reservations" and method == "GET":
+            return 200, self._reservations(user_number, query)
+
+        if path == "/v3/reservation" and method == "POST":
+            return 200, {"result": {"reservation": {"id": "reservation-new"}}}
+
+        if path == "/v3/reservation" and method == "DELETE":
+            return 204, None
+
+        if path.endswith("/checkin"):
+            return 200, {}
+
+        if path.endswith("/checkout"):
+            return 204, None
+
+        return 404, {"message": f"Not found: {method} {path}"}
+
+    def _reservations(self, user_number: str, query: dict) -> dict:
+        start = time.strptime(query["from"], "%Y-%m-%d")
+        end = time.strptime(query["to"], "%Y-%m-%d")
+        days = max(1, round((time.mktime(end) - time.mktime(start)) / 86400))
+        items = []
+
+        for day in range(days):
+            date = time.strftime(
+                "%Y-%m-%d", time.localtime(time.mktime(start) + day * 86400)
+            )
+
+            for number in range(self.reservations_per_day):
+                is_home = (int(user_number or 0) + number) % 2 == 0
+                items.append(
+                    {
+                        "id": f"reservation-{user_number}-{date}-{number}",
+                        "user": {
+                            "id": f"bmd-user-{user_number}",
+                            "firstName": "Bench",
+                            "infix": "",
+                            "lastName": f"Mark {user_number}",
+                        },
+                        "dateStart": f"{date}T08:00:00+00:00",
+                        "dateEnd": f"{date}T17:00:00+00:00",
+                        "from": "08:00",
+                        "to": "17:00",
+                        "status": "reserved",
+                        "type": "home" if is_home else "normal",
+                        "seat": None
+                        if is_home
+                        else {
+                            "id": "seat-1",
+                            "map": {"id": "map-1", "name": "Floor 1"},
+                        },
+                    }
+                )
+
+        skip = int(query.get("skip", 0))
+        take = int(query.get("take", 10))
+
+        return {"result": {"items": items[skip : skip + take], "total": len(items)}}
+
+
+class FakeSlack(FakeBackend):
+    """Acknowledges any Web API call. Has a single IM channel per user, each containing a few old messages."""
+
+    def __init__(self, user_count: int = 0, messages_per_channel: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.user_count = user_count
+        self.messages_per_channel = messages_per_channel
+
+    def error_response(self) -> Tuple[int, dict]:
+        return 200, {"ok": False, "error": "internal_error"}
+
+    def handle(
+        self, method: str, path: str, query: dict, body: dict, headers: dict
+    ) -> Tuple[int, dict]:
+        api_method = path.rsplit("/", 1)[-1]
+
+        if api_method in ("views.open", "views.update"):
+            return 200, {"ok": True, "view": {"id": "V0BENCHMARK", "hash": "hash"}}
+
+        if api_method == "conversations.list":
+            return 200, {
+                "ok": True,
+                "channels": [{"id": f"D{x}"} for x in range(self.user_count)],
+            }
+
+        if api_method == "conversations.history":
+            old_timestamp = time.time() - 30 * 24 * 3600
+            return 200, {
+                "ok": True,
+                "messages": [
+                    {"ts": f"{old_timestamp + x:.6f}"}
+                    for x in range(self.messages_per_channel)
+                ],
+            }
+
+        return 200, {"ok": True}
+
+
+def _decode_body(content: bytes, content_type: str) -> dict:
+    if not content:
+        return {}
+
+    if content_type.startswith("application/json"):
+        return json.loads(content)
+
+    return {k: v[0] for k, v in parse_qs(content.decode()).items()}
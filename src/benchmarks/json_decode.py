@@ -0,0 +1,89 @@
+"""
+Decode time per BookMyDesk response, comparing decoding the body twice (once for debug logging, once for the result,
+as the client used to) against decoding it once. Uses a synthetic company-extended payload, unless the path to a
+recorded one is given, e.g.:
+
+    python -m benchmarks.json_decode /tmp/company_extended.json
+"""
+import json
+import sys
+import timeit
+
+
+ITERATIONS = 200
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as recorded_file:
+            content = recorded_file.read()
+    else:
+        content = json.dumps(_synthetic_company_extended()).encode()
+
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+
+    decoders = {
+        "json, decoded twice": lambda: (json.loads(content), json.loads(content)),
+        "json, decoded once": lambda: json.loads(content),
+    }
+
+    if orjson is not None:
+        decoders["orjson, decoded once"] = lambda: orjson.loads(content)
+
+    print(f"Payload size: {len(content)} bytes")
+    print(f"{'decoder':<24} {'ms':>9}")
+
+    for name, decoder in decoders.items():
+        decode_time = timeit.timeit(decoder, number=ITERATIONS) / ITERATIONS * 1000
+        print(f"{name:<24} {decode_time:>9.3f}")
+
+    if orjson is None:
+        print("(orjson not installed, skipped)")
+
+
+def _synthetic_company_extended(
+    location_count=10, maps_per_location=5, seats_per_map=100
+) -> dict:
+    """Roughly the shape of a large company tree."""
+    return {
+        "result": {
+            "company": {
+                "id": "company-1",
+                "name": "Benchmark company",
+                "locations": [
+                    {
+                        "id": f"location-{location}",
+                        "name": f"Location {location}",
+                        "address": f"Street {location}, City",
+                        "maps": [
+                            {
+                                "id": f"map-{location}-{map_}",
+                                "name": f"Floor {map_}",
+                                "seats": [
+                                    {
+                                        "id": f"seat-{location}-{map_}-{seat}",
+                                        "name": f"Desk {seat}",
+                                        "type": "desk",
+                                        "isAvailable": seat % 3 != 0,
+                                        "tags": ["monitor", "standing"],
+                                        "x": seat * 1.5,
+                                        "y": map_ * 2.5,
+                                    }
+                                    for seat in range(seats_per_map)
+                                ],
+                            }
+                            for map_ in range(maps_per_location)
+                        ],
+                    }
+                    for location in range(location_count)
+                ],
+            }
+        }
+    }
+
+
+if __name__ == "__main__":
+    main()
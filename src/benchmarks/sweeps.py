@@ -0,0 +1,82 @@
+"""
+Peak memory of iterating all users with a session, comparing the full queryset (as the tasks used to) against a
+keyset sweep selecting only the session fields. The sweep should stay flat no matter the number of users, e.g.:
+
+    python -m benchmarks.sweeps --users 100 1000 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks import setup_django
+
+
+BATCH_SIZE = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[100, 10000, 100000])
+    arguments = parser.parse_args()
+
+    setup_django()
+
+    from django.core.management import call_command
+
+    from bmd_core.models import BotMyDeskUser
+    from bmd_core.sweeps import sweep
+
+    call_command("migrate", verbosity=0)
+
+    iterators = {
+        "full queryset": lambda: iter(BotMyDeskUser.objects.with_session()),
+        "sweep": lambda: sweep(
+            BotMyDeskUser.objects.with_session(),
+            fields=BotMyDeskUser.SESSION_FIELDS,
+        ),
+    }
+
+    print(f"{'users':>7} {'iterator':<14} {'peak KiB':>9} {'s':>7}")
+
+    for user_count in sorted(arguments.users):
+        _create_users(user_count - BotMyDeskUser.objects.count())
+
+        for name, iterator in iterators.items():
+            tracemalloc.start()
+            start = time.perf_counter()
+
+            for _ in iterator():
+                pass
+
+            duration = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{user_count:>7} {name:<14} {peak / 1024:>9.0f} {duration:>7.2f}")
+
+
+def _create_users(count: int):
+    from django.utils import timezone
+
+    from bmd_core.models import BotMyDeskUser
+
+    offset = BotMyDeskUser.objects.count()
+    expires_at = timezone.now() + timezone.timedelta(days=365)
+    BotMyDeskUser.objects.bulk_create(
+        (
+            BotMyDeskUser(
+                slack_user_id=f"U{x}",
+                slack_email=f"user{x}@example.com",
+                slack_name=f"User {x}",
+                slack_tz="Europe/Amsterdam",
+                bookmydesk_access_token=f"token-{x}",
+                bookmydesk_access_token_expires_at=expires_at,
+                bookmydesk_refresh_token=f"refresh-{x}",
+            )
+            for x in range(offset, offset + count)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+if __name__ == "__main__":
+    main()
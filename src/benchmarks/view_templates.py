@@ -0,0 +1,86 @@
+"""
+Render time and memory allocated per render of the Slack views, comparing cold caches (building every view from
+scratch, as it used to be) against warm caches (only filling in per-user fields).
+"""
+import datetime
+import timeit
+import tracemalloc
+
+from benchmarks import setup_django
+
+
+ITERATIONS = 2000
+
+
+def main():
+    setup_django()
+
+    from django.utils import translation
+
+    from bmd_core.models import BotMyDeskUser
+    import bmd_core.view_templates
+
+    botmydesk_user = BotMyDeskUser(
+        slack_user_id="U0BENCHMARK",
+        slack_email="benchmark@example.com",
+        slack_name="Benchmark",
+        slack_tz="Europe/Amsterdam",
+        preferred_notification_time_on_mondays=datetime.time(hour=7),
+        preferred_notification_time_on_wednesdays=datetime.time(hour=8, minute=30),
+    )
+    renderers = {
+        "help (authorized)": lambda: bmd_core.view_templates.help_blocks(True),
+        "help (unauthorized)": lambda: bmd_core.view_templates.help_blocks(False),
+        "preferences (authorized)": lambda: bmd_core.view_templates.authorized_preferences_view(
+            botmydesk_user, "Bench Mark"
+        ),
+        "preferences (unauthorized)": lambda: bmd_core.view_templates.unauthorized_preferences_view(
+            botmydesk_user
+        ),
+        "app home (authorized)": lambda: bmd_core.view_templates.authorized_app_home_blocks(
+            []
+        ),
+        "app home (unauthorized)": lambda: bmd_core.view_templates.unauthorized_app_home_blocks(
+            botmydesk_user
+        ),
+        "app home opened (welcome)": lambda: bmd_core.view_templates.app_home_opened_welcome_blocks(
+            botmydesk_user
+        ),
+    }
+
+    print(
+        f"{'view':<28} {'locale':<7} {'cold µs':>9} {'warm µs':>9} {'cold peak B':>11} {'warm peak B':>11}"
+    )
+
+    for language in ("en", "nl"):
+        translation.activate(language)
+
+        for name, renderer in renderers.items():
+
+            def cold_render():
+                bmd_core.view_templates.clear_cache()
+                return renderer()
+
+            cold_time, cold_bytes = _measure(cold_render)
+            renderer()  # Warm up
+            warm_time, warm_bytes = _measure(renderer)
+
+            print(
+                f"{name:<28} {language:<7} {cold_time:>9.1f} {warm_time:>9.1f} {cold_bytes:>11} {warm_bytes:>11}"
+            )
+
+
+def _measure(renderer) -> tuple:
+    """Returns the average render time in µs and the peak memory allocated by a single render in bytes."""
+    render_time = timeit.timeit(renderer, number=ITERATIONS) / ITERATIONS * 1_000_000
+
+    tracemalloc.start()
+    renderer()
+    _, peak_allocated_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return render_time, peak_allocated_bytes
+
+
+if __name__ == "__main__":
+    main()
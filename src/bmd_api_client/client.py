@@ -1,9 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import logging
 import zoneinfo
-from pprint import pformat
-from typing import Optional
+from typing import Iterator, Optional
 
 from django.conf import settings
+from django.db import connections
 from django.utils import timezone
 from django.core.cache import cache
 import requests
@@ -13,44 +15,50 @@ from bmd_api_client.dto import (
     V3CompanyExtendedResult,
     TokenLoginResult,
     V3ReservationsResult,
+    Reservation,
 )
 from bmd_api_client.exceptions import BookMyDeskException
+from bmd_core.logging_utils import LazyPformat
+import bmd_core.concurrency
+import bmd_core.metrics
+import bmd_core.tracing
 from bmd_core.models import BotMyDeskUser
 
+try:
+    # Optional, but way faster for large responses (e.g. company info).
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 
 bookmydesk_client_logger = logging.getLogger("bookmydesk_client")
 
 
 def request_login_code(email: str):
     """Requests and sends a login code to the designated email address."""
-    bookmydesk_client_logger.debug(f"Requesting login code for {email}")
-    response = requests.post(
-        url=f"{settings.BOOKMYDESK_API_URL}/request-login",
+    bookmydesk_client_logger.debug("Requesting login code for %s", email)
+    _request(
+        "POST",
+        "/request-login",
+        label=email,
+        expected_status_code=204,
+        failure_description=f"request login code for {email}",
+        decode=False,
         json={
             "email": email,
         },
-        headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
-        },
     )
-    bookmydesk_client_logger.info(
-        "(%s) Received HTTP %s on: %s",
-        email,
-        response.status_code,
-        response.request.url,
-    )
-
-    if response.status_code != 204:
-        bookmydesk_client_logger.error(
-            f"FAILED to request login code for {email} (HTTP {response.status_code}): {response.content}"
-        )
-        raise BookMyDeskException(response.content)
 
 
 def token_login(username: str, otp: str) -> TokenLoginResult:
     """Login with OTP and fetch access/refresh tokens."""
-    response = requests.post(
-        url=f"{settings.BOOKMYDESK_API_URL}/token",
+    json_response = _request(
+        "POST",
+        "/token",
+        label=username,
+        expected_status_code=200,
+        failure_description=f"token login for {username}",
+        sensitive=True,
         data={
             "grant_type": "password",
             "client_id": settings.BOOKMYDESK_CLIENT_ID,
@@ -60,84 +68,53 @@ def token_login(username: str, otp: str) -> TokenLoginResult:
             "scopes": "",
         },
         headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
             "Content-Type": "application/x-www-form-urlencoded",
         },
     )
-    bookmydesk_client_logger.info(
-        "(%s) Received HTTP %s on: %s",
-        username,
-        response.status_code,
-        response.request.url,
-    )
 
-    if response.status_code != 200:
-        bookmydesk_client_logger.error(
-            f"FAILED to token login for {username} (HTTP {response.status_code}): {response.content}"
-        )
-        raise BookMyDeskException(response.content)
-
-    return TokenLoginResult(response.json())
+    return TokenLoginResult(json_response)
 
 
 def logout(botmydesk_user: BotMyDeskUser):
-    response = requests.post(
-        url=f"{settings.BOOKMYDESK_API_URL}/logout",
-        headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
-            "Authorization": f"Bearer {botmydesk_user.bookmydesk_access_token}",
-        },
+    _request(
+        "POST",
+        "/logout",
+        botmydesk_user=botmydesk_user,
+        expected_status_code=200,
+        failure_description=f"terminate session of {botmydesk_user.slack_email}",
+        decode=False,
     )
-    bookmydesk_client_logger.info(
-        "(%s) Received HTTP %s on: %s",
-        botmydesk_user.slack_email,
-        response.status_code,
-        response.request.url,
-    )
-
-    if response.status_code != 200:
-        bookmydesk_client_logger.error(
-            f"FAILED to terminate session of {botmydesk_user.slack_email} (HTTP {response.status_code}): {response.content}"
-        )
-        raise BookMyDeskException(response.content)
 
 
 def refresh_session(botmydesk_user: BotMyDeskUser):
     """Refresh session, updates user as well"""
     botmydesk_user.refresh_from_db()
 
-    response = requests.post(
-        url=f"{settings.BOOKMYDESK_API_URL}/token",
-        data={
-            "grant_type": "refresh_token",
-            "client_id": settings.BOOKMYDESK_CLIENT_ID,
-            "client_secret": settings.BOOKMYDESK_CLIENT_SECRET,
-            "refresh_token": botmydesk_user.bookmydesk_refresh_token,
-        },
-        headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
-            "Content-Type": "application/x-www-form-urlencoded",
-        },
-    )
-    bookmydesk_client_logger.info(
-        "(%s) Received HTTP %s on: %s",
-        botmydesk_user.slack_email,
-        response.status_code,
-        response.request.url,
-    )
-
-    if response.status_code != 200:
-        bookmydesk_client_logger.error(
-            f"FAILED to refresh session of {botmydesk_user.slack_email} (HTTP {response.status_code}): {response.content}"
+    try:
+        json_response = _request(
+            "POST",
+            "/token",
+            label=botmydesk_user.slack_email,
+            expected_status_code=200,
+            failure_description=f"refresh session of {botmydesk_user.slack_email}",
+            sensitive=True,
+            data={
+                "grant_type": "refresh_token",
+                "client_id": settings.BOOKMYDESK_CLIENT_ID,
+                "client_secret": settings.BOOKMYDESK_CLIENT_SECRET,
+                "refresh_token": botmydesk_user.bookmydesk_refresh_token,
+            },
+            headers={
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
         )
-
+    except BookMyDeskException:
         botmydesk_user.clear_tokens()
         bookmydesk_client_logger.error(
             f"Cleared session info of {botmydesk_user.slack_email}, reauthorization required..."
         )
-        raise BookMyDeskException(response.content)
+        raise
 
-    json_response = response.json()
     botmydesk_user.update(
         bookmydesk_access_token=json_response["access_token"],
         bookmydesk_access_token_expires_at=timezone.now()
@@ -157,37 +134,34 @@ def me_v3(botmydesk_user: BotMyDeskUser) -> V3BookMyDeskProfileResult:
     cached_result = cache.get(CACHE_KEY)
 
     if cached_result is not None:
-        bookmydesk_client_logger.info("Using cached result for: %s", CACHE_KEY)
+        bookmydesk_client_logger.info(
+            "Using cached result for: %s", CACHE_KEY, extra={"sampled": True}
+        )
+        bmd_core.metrics.increment(
+            "botmydesk_cache_requests_total", cache="me_v3", result="hit"
+        )
         return cached_result
 
-    response = requests.get(
-        url=f"{settings.BOOKMYDESK_API_URL}/v3/me",
-        headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
-            "Authorization": f"Bearer {botmydesk_user.bookmydesk_access_token}",
-        },
+    bmd_core.metrics.increment(
+        "botmydesk_cache_requests_total", cache="me_v3", result="miss"
     )
-    bookmydesk_client_logger.info(
-        "(%s) Received HTTP %s on: %s",
-        botmydesk_user.slack_email,
-        response.status_code,
-        response.request.url,
-    )
-    bookmydesk_client_logger.debug(
-        "(%s) Response content:\n%s",
-        botmydesk_user.slack_email,
-        pformat(response.json(), indent=2),
+    json_response = _request(
+        "GET",
+        "/v3/me",
+        botmydesk_user=botmydesk_user,
+        expected_status_code=200,
+        failure_description=f"get me/profile of {botmydesk_user.slack_email}",
     )
 
-    if response.status_code != 200:
-        bookmydesk_client_logger.error(
-            f"FAILED to get me/profile of {botmydesk_user.slack_email} (HTTP {response.status_code}): {response.content}"
-        )
-        raise BookMyDeskException(response.content)
-
-    result = V3BookMyDeskProfileResult(response.json()["result"])
+    result = V3BookMyDeskProfileResult(json_response["result"])
     cache.set(CACHE_KEY, result, 60)
 
+    # Only written when changed.
+    botmydesk_user.update(
+        bookmydesk_user_id=result.id(),
+        bookmydesk_company_id=result.first_company_id(),
+    )
+
     return result
 
 
@@ -200,42 +174,34 @@ def company_extended_v3(botmydesk_user: BotMyDeskUser) -> V3CompanyExtendedResul
     # For now, always use the first company found.
     profile = me_v3(botmydesk_user=botmydesk_user)
 
-    CACHE_KEY = f"me_v3_{botmydesk_user.slack_user_id}"
+    # Identical for anyone in the company.
+    CACHE_KEY = f"company_extended_v3_{profile.first_company_id()}"
     cached_result = cache.get(CACHE_KEY)
 
     if cached_result is not None:
-        bookmydesk_client_logger.info("Using cached result for: %s", CACHE_KEY)
+        bookmydesk_client_logger.info(
+            "Using cached result for: %s", CACHE_KEY, extra={"sampled": True}
+        )
+        bmd_core.metrics.increment(
+            "botmydesk_cache_requests_total", cache="company_extended_v3", result="hit"
+        )
         return cached_result
 
-    response = requests.get(
-        url=f"{settings.BOOKMYDESK_API_URL}/v3/companyExtended",
+    bmd_core.metrics.increment(
+        "botmydesk_cache_requests_total", cache="company_extended_v3", result="miss"
+    )
+    json_response = _request(
+        "GET",
+        "/v3/companyExtended",
+        botmydesk_user=botmydesk_user,
+        expected_status_code=200,
+        failure_description="get company details",
         params={
             "companyId": profile.first_company_id(),
         },
-        headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
-            "Authorization": f"Bearer {botmydesk_user.bookmydesk_access_token}",
-        },
     )
-    bookmydesk_client_logger.info(
-        "(%s) Received HTTP %s on: %s",
-        botmydesk_user.slack_email,
-        response.status_code,
-        response.request.url,
-    )
-    bookmydesk_client_logger.debug(
-        "(%s) Response content:\n%s",
-        botmydesk_user.slack_email,
-        pformat(response.json(), indent=2),
-    )
-
-    if response.status_code != 200:
-        bookmydesk_client_logger.error(
-            f"FAILED to get own reservations (HTTP {response.status_code}): {response.content}"
-        )
-        raise BookMyDeskException(response.content)
 
-    result = V3CompanyExtendedResult(response.json()["result"]["company"])
+    result = V3CompanyExtendedResult(json_response["result"]["company"])
     cache.set(CACHE_KEY, result, 3600)
 
     return result
@@ -263,37 +229,69 @@ def list_reservations_v3(
         "to": (
             today + timezone.timedelta(days=1)
         ).date(),  # Yes, kinda sucks and ambiguous
-        "take": 50,  # Limit, default 10
+        "take": settings.BOOKMYDESK_RESERVATIONS_PAGE_SIZE,  # Limit, default 10
     }
     parameters.update(override_parameters)
 
-    response = requests.get(
-        url=f"{settings.BOOKMYDESK_API_URL}/v3/reservations",
+    json_response = _request(
+        "GET",
+        "/v3/reservations",
+        botmydesk_user=botmydesk_user,
+        expected_status_code=200,
+        failure_description=f"get reservations of {botmydesk_user.slack_email}",
         params=parameters,
-        headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
-            "Authorization": f"Bearer {botmydesk_user.bookmydesk_access_token}",
-        },
-    )
-    bookmydesk_client_logger.info(
-        "(%s) Received HTTP %s on: %s",
-        botmydesk_user.slack_email,
-        response.status_code,
-        response.request.url,
     )
-    bookmydesk_client_logger.debug(
-        "(%s) Response content:\n%s",
-        botmydesk_user.slack_email,
-        pformat(response.json(), indent=2),
+
+    return V3ReservationsResult(json_response)
+
+
+def iterate_reservations_v3(
+    botmydesk_user: BotMyDeskUser, prefetch: bool = False, **override_parameters
+) -> Iterator[Reservation]:
+    """
+    Lazily yields all reservations matching the parameters, following the total count reported by the API page by page.
+    Parameters are identical to list_reservations_v3(). With prefetch, the next page is requested in the background
+    while the current one is being consumed.
+    """
+    page_size = int(
+        override_parameters.pop("take", settings.BOOKMYDESK_RESERVATIONS_PAGE_SIZE)
     )
+    skip = int(override_parameters.pop("skip", 0))
 
-    if response.status_code != 200:
-        bookmydesk_client_logger.error(
-            f"FAILED to get reservations of {botmydesk_user.slack_email} (HTTP {response.status_code}): {response.content}"
+    def fetch_page(page_skip: int) -> V3ReservationsResult:
+        return list_reservations_v3(
+            botmydesk_user, take=page_size, skip=page_skip, **override_parameters
         )
-        raise BookMyDeskException(response.content)
 
-    return V3ReservationsResult(response.json())
+    def prefetch_page(page_skip: int) -> V3ReservationsResult:
+        try:
+            return fetch_page(page_skip)
+        finally:
+            # Any DB connection opened by a token refresh is bound to the prefetch thread.
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        next_page = None
+        page = fetch_page(skip)
+
+        while True:
+            reservations = page.reservations()
+            skip += len(reservations)
+            has_next_page = bool(reservations) and skip < page.result_count()
+
+            if prefetch and has_next_page:
+                # Copies context, so the prefetch is traced as part of the current span.
+                next_page = executor.submit(
+                    contextvars.copy_context().run, prefetch_page, skip
+                )
+
+            yield from reservations
+
+            if not has_next_page:
+                return
+
+            page = next_page.result() if next_page is not None else fetch_page(skip)
+            next_page = None
 
 
 def create_reservation_v3(
@@ -322,33 +320,16 @@ def create_reservation_v3(
     if seat_id:
         parameters.update({"seatId": seat_id})
 
-    response = requests.post(
-        url=f"{settings.BOOKMYDESK_API_URL}/v3/reservation",
+    json_response = _request(
+        "POST",
+        "/v3/reservation",
+        botmydesk_user=botmydesk_user,
+        expected_status_code=200,
+        failure_description=f"create reservation of {botmydesk_user.slack_email}",
         json=parameters,
-        headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
-            "Authorization": f"Bearer {botmydesk_user.bookmydesk_access_token}",
-        },
-    )
-    bookmydesk_client_logger.info(
-        "(%s) Received HTTP %s on: %s",
-        botmydesk_user.slack_email,
-        response.status_code,
-        response.request.url,
-    )
-    bookmydesk_client_logger.debug(
-        "(%s) Response content:\n%s",
-        botmydesk_user.slack_email,
-        pformat(response.json(), indent=2),
     )
 
-    if response.status_code != 200:
-        bookmydesk_client_logger.error(
-            f"FAILED to create reservation of {botmydesk_user.slack_email} (HTTP {response.status_code}): {response.content}"
-        )
-        raise BookMyDeskException(response.content)
-
-    return response.json()["result"]["reservation"]["id"]
+    return json_response["result"]["reservation"]["id"]
 
 
 def reservation_check_in_out(
@@ -360,30 +341,18 @@ def reservation_check_in_out(
         botmydesk_user.refresh_from_db()
 
     check_in_or_out = "checkin" if check_in else "checkout"
-    response = requests.post(
-        url=f"{settings.BOOKMYDESK_API_URL}/reservation/{reservation_id}/{check_in_or_out}",
+    _request(
+        "POST",
+        f"/reservation/{reservation_id}/{check_in_or_out}",
+        endpoint=f"/reservation/:id/{check_in_or_out}",
+        botmydesk_user=botmydesk_user,
+        expected_status_code=200 if check_in else 204,
+        failure_description=f"{check_in_or_out} from reservation of {botmydesk_user.slack_email}",
+        decode=False,
         json={
             "type": "manual",
         },
-        headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
-            "Authorization": f"Bearer {botmydesk_user.bookmydesk_access_token}",
-        },
     )
-    bookmydesk_client_logger.info(
-        "(%s) Received HTTP %s on: %s",
-        botmydesk_user.slack_email,
-        response.status_code,
-        response.request.url,
-    )
-
-    expected_status_code = 200 if check_in else 204
-
-    if response.status_code != expected_status_code:
-        bookmydesk_client_logger.error(
-            f"FAILED to {check_in_or_out} from reservation of {botmydesk_user.slack_email} (HTTP {response.status_code}): {response.content}"
-        )
-        raise BookMyDeskException(response.content)
 
 
 def delete_reservation_v3(botmydesk_user: BotMyDeskUser, reservation_id: str):
@@ -392,25 +361,98 @@ def delete_reservation_v3(botmydesk_user: BotMyDeskUser, reservation_id: str):
         refresh_session(botmydesk_user)
         botmydesk_user.refresh_from_db()
 
-    response = requests.delete(
-        url=f"{settings.BOOKMYDESK_API_URL}/v3/reservation",
+    _request(
+        "DELETE",
+        "/v3/reservation",
+        botmydesk_user=botmydesk_user,
+        expected_status_code=204,
+        failure_description=f"delete reservation of {botmydesk_user.slack_email}",
+        decode=False,
         params={
             "reservationId": reservation_id,
         },
-        headers={
-            "User-Agent": settings.BOTMYDESK_USER_AGENT,
-            "Authorization": f"Bearer {botmydesk_user.bookmydesk_access_token}",
-        },
+    )
+
+
+def _request(
+    method: str,
+    path: str,
+    expected_status_code: int,
+    failure_description: str,
+    botmydesk_user: Optional[BotMyDeskUser] = None,
+    label: Optional[str] = None,
+    headers: Optional[dict] = None,
+    endpoint: Optional[str] = None,
+    decode: bool = True,
+    sensitive: bool = False,
+    **request_kwargs,
+) -> Optional[dict]:
+    """
+    Performs the request on behalf of the user, if given. Returns the response body decoded, if any and if requested.
+    The body is only decoded once, no matter whether it's logged as well. Sensitive bodies (e.g. tokens) are never logged.
+    Metrics are recorded per endpoint, which defaults to the path. Override it for paths containing IDs.
+    """
+    endpoint = endpoint or path
+    headers = {
+        "User-Agent": settings.BOTMYDESK_USER_AGENT,
+        **(headers or {}),
+    }
+
+    if botmydesk_user is not None:
+        headers["Authorization"] = f"Bearer {botmydesk_user.bookmydesk_access_token}"
+        label = botmydesk_user.slack_email
+
+    bmd_core.concurrency.wait_for_rate_limit()
+
+    try:
+        with bmd_core.tracing.span(
+            f"bookmydesk {method} {endpoint}"
+        ) as span, bmd_core.metrics.timed(
+            "botmydesk_bookmydesk_request_duration_seconds", endpoint=endpoint
+        ):
+            response = requests.request(
+                method,
+                url=f"{settings.BOOKMYDESK_API_URL}{path}",
+                headers=headers,
+                **request_kwargs,
+            )
+
+            if span is not None:
+                span.set_attribute("status", response.status_code)
+    except requests.RequestException:
+        bmd_core.metrics.increment(
+            "botmydesk_bookmydesk_requests_total", endpoint=endpoint, status="error"
+        )
+        raise
+
+    bmd_core.metrics.increment(
+        "botmydesk_bookmydesk_requests_total",
+        endpoint=endpoint,
+        status=response.status_code,
     )
     bookmydesk_client_logger.info(
         "(%s) Received HTTP %s on: %s",
-        botmydesk_user.slack_email,
+        label,
         response.status_code,
         response.request.url,
     )
 
-    if response.status_code != 204:
+    if response.status_code != expected_status_code:
         bookmydesk_client_logger.error(
-            f"FAILED to delete reservation of {botmydesk_user.slack_email} (HTTP {response.status_code}): {response.content}"
+            f"FAILED to {failure_description} (HTTP {response.status_code}): {response.content}"
         )
         raise BookMyDeskException(response.content)
+
+    if not decode or not response.content:
+        return None
+
+    json_response = json_loads(response.content)
+
+    if not sensitive:
+        bookmydesk_client_logger.debug(
+            "(%s) Response content:\n%s",
+            label,
+            LazyPformat(json_response),
+        )
+
+    return json_response
@@ -11,6 +11,10 @@ class JsonResponseHolder:
     def __init__(self, response: dict):
         self._response = response
 
+    def data(self) -> dict:
+        """As received."""
+        return self._response
+
 
 class LocationMapSeat(JsonResponseHolder):
     def id(self) -> str:
@@ -60,6 +64,16 @@ class Reservation(JsonResponseHolder):
     def owner_id(self) -> str:
         return self._response["user"]["id"]
 
+    def owner_name(self) -> Optional[str]:
+        """Not available for anonymous reservations."""
+        user = self._response.get("user") or {}
+        name = " ".join(
+            x
+            for x in (user.get("firstName"), user.get("infix"), user.get("lastName"))
+            if x
+        )
+        return name or None
+
     def date_start(self) -> timezone.datetime:
         return timezone.datetime.fromisoformat(self._response["dateStart"])
 
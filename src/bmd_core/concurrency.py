@@ -0,0 +1,101 @@
+"""
+Bounded concurrency for slow upstream calls per item, e.g. per user in sweeps. Items are processed by a small pool of
+threads, one batch at a time, so neither memory nor the number of calls in flight grow with the number of items.
+"""
+import contextlib
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+
+# Applies to the current context and any threads started from it by map_concurrently(). See rate_limited().
+_rate_limiter = contextvars.ContextVar("rate_limiter", default=None)
+
+
+class RateLimiter:
+    """Spaces calls evenly, shared by any number of threads, to stay within an upstream rate limit."""
+
+    def __init__(self, per_second: float):
+        self._interval = 1 / per_second
+        self._lock = threading.Lock()
+        self._next_call = time.monotonic()
+
+    def wait(self):
+        """Blocks until the next call is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            call_at = max(self._next_call, now)
+            self._next_call = call_at + self._interval
+
+        time.sleep(call_at - now)
+
+
+@contextlib.contextmanager
+def rate_limited(per_second: Optional[float] = None):
+    """
+    Limits upstream calls made within the block, including by any threads of map_concurrently(). Use it as decorator
+    for bulk tasks. Defaults to BOTMYDESK_BOOKMYDESK_RATE_LIMIT.
+    """
+    token = _rate_limiter.set(
+        RateLimiter(per_second or settings.BOTMYDESK_BOOKMYDESK_RATE_LIMIT)
+    )
+
+    try:
+        yield
+    finally:
+        _rate_limiter.reset(token)
+
+
+def wait_for_rate_limit():
+    """Call this before any upstream call. Only blocks within rate_limited()."""
+    rate_limiter = _rate_limiter.get()
+
+    if rate_limiter is not None:
+        rate_limiter.wait()
+
+
+def map_concurrently(
+    function: Callable,
+    items: Iterable,
+    max_workers: int,
+    batch_size: int = 0,
+) -> Iterator[Tuple[object, object, Optional[Exception]]]:
+    """
+    Calls the function for each item, yielding (item, result, error) in order. Errors are yielded instead of raised,
+    so one failing item never stops the others. The next batch is only started once the current one is consumed.
+    """
+    batch_size = batch_size or max_workers
+    items = iter(items)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            batch = list(islice(items, batch_size))
+
+            if not batch:
+                return
+
+            # Copies context, so the calls are traced as part of the current span and share any rate limit.
+            futures = [
+                executor.submit(contextvars.copy_context().run, _call, function, x)
+                for x in batch
+            ]
+
+            for item, future in zip(batch, futures):
+                try:
+                    yield item, future.result(), None
+                except Exception as error:
+                    yield item, None, error
+
+
+def _call(function: Callable, item):
+    try:
+        return function(item)
+    finally:
+        # Any DB connection opened is bound to the pool thread.
+        connections.close_all()
@@ -0,0 +1,118 @@
+"""
+Leases for long-running tasks, to prevent them from overlapping when they run longer than their schedule interval.
+Leases expire unless extended, so a crashed worker never blocks a task forever. Sweeps can store a checkpoint in their
+lease, so the next run resumes where an unfinished one stopped.
+"""
+import contextlib
+import functools
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from bmd_core.models import TaskLease
+
+
+botmydesk_logger = logging.getLogger("botmydesk")
+
+
+class LeaseLost(Exception):
+    """The lease expired and was taken over by another process meanwhile."""
+
+
+class Lease:
+    def __init__(self, name: str, ttl: int):
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._last_heartbeat = time.monotonic()
+
+    def acquire(self) -> bool:
+        self._last_heartbeat = time.monotonic()
+        return TaskLease.objects.acquire(name=self.name, owner=self.owner, ttl=self.ttl)
+
+    def resume_after_pk(self) -> int:
+        """The checkpoint of the last unfinished run, if any."""
+        return (
+            TaskLease.objects.filter(name=self.name)
+            .values_list("last_processed_pk", flat=True)
+            .get()
+            or 0
+        )
+
+    def checkpoint(self, last_processed_pk: int):
+        """Records progress, extending the lease as well. Throttled, so call it after every item processed."""
+        if self._heartbeat_due():
+            self._update(last_processed_pk=last_processed_pk)
+
+    def heartbeat(self):
+        """Extends the lease, for tasks without checkpoints. Throttled as well."""
+        if self._heartbeat_due():
+            self._update()
+
+    def complete(self):
+        """Clears the checkpoint, so the next run starts from the beginning."""
+        self._update(last_processed_pk=None)
+
+    def release(self):
+        TaskLease.objects.filter(name=self.name, owner=self.owner).update(
+            owner=None, expires_at=None
+        )
+
+    def _heartbeat_due(self) -> bool:
+        return (
+            time.monotonic() - self._last_heartbeat
+            >= settings.BOTMYDESK_TASK_LEASE_HEARTBEAT_INTERVAL
+        )
+
+    def _update(self, **fields):
+        updated = TaskLease.objects.filter(name=self.name, owner=self.owner).update(
+            expires_at=timezone.now() + timezone.timedelta(seconds=self.ttl),
+            **fields,
+        )
+        self._last_heartbeat = time.monotonic()
+
+        if not updated:
+            raise LeaseLost(f"Lost lease of {self.name}")
+
+
+@contextlib.contextmanager
+def task_lease(name: str, ttl: Optional[int] = None) -> Iterator[Optional[Lease]]:
+    """
+    Yields the lease when acquired, or None when held by another run. Completes the lease when the block succeeds, or
+    keeps its checkpoint otherwise. Either way the lease is released afterwards.
+    """
+    lease = Lease(name, ttl or settings.BOTMYDESK_TASK_LEASE_TTL)
+
+    if not lease.acquire():
+        botmydesk_logger.warning(f"Skipped {name}, as another run is still active")
+        yield None
+        return
+
+    try:
+        yield lease
+        lease.complete()
+    finally:
+        lease.release()
+
+
+def leased(function: Callable) -> Callable:
+    """
+    Decorator running the task function within a lease named after it, passing the lease as first argument. Runs
+    finding the lease held by another run are skipped, returning None.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with task_lease(function.__name__) as lease:
+            if lease is None:
+                return None
+
+            return function(lease, *args, **kwargs)
+
+    return wrapper
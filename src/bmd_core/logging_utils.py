@@ -0,0 +1,57 @@
+"""Logging helpers, to keep logging cheap. Especially for anything not logged at all due to the current log level."""
+import logging
+import pprint
+import random
+from typing import Any
+
+
+# Any attribute not in here is considered a structured one, e.g. when passed as "extra" to a logger.
+_DEFAULT_RECORD_ATTRIBUTES = set(
+    logging.LogRecord("", logging.INFO, "", 0, "", (), None).__dict__.keys()
+) | {"message", "asctime", "sampled"}
+
+
+class LazyPformat:
+    """Pretty formats the value (or the result of the callable given) only when actually logged."""
+
+    def __init__(self, value: Any):
+        self._value = value
+
+    def __str__(self) -> str:
+        value = self._value() if callable(self._value) else self._value
+        return pprint.pformat(value, indent=2)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Appends any structured attributes of the record as key-value pairs."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        structured_attributes = {
+            key: value
+            for key, value in record.__dict__.items()
+            if key not in _DEFAULT_RECORD_ATTRIBUTES
+        }
+
+        if not structured_attributes:
+            return message
+
+        return (
+            message
+            + " | "
+            + " ".join(f"{key}={value}" for key, value in structured_attributes.items())
+        )
+
+
+class SamplingFilter(logging.Filter):
+    """Only passes a fraction of records marked as sampled (e.g. extra={"sampled": True}). For high-frequency paths."""
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+
+        return random.random() < self.sample_rate
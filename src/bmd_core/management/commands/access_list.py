@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bmd_core.models import AccessListEntry
+
+
+class Command(BaseCommand):
+    """Changes apply to any running process within a few seconds, no restart required."""
+
+    help = "Allow, deny or reset Slack users in the access lists. Or show the current ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=("allow", "deny", "reset", "show"))
+        parser.add_argument("slack_user_ids", nargs="*")
+
+    def handle(self, **options):
+        action = options["action"]
+        slack_user_ids = options["slack_user_ids"]
+
+        if action == "show":
+            for current in AccessListEntry.objects.order_by("access", "slack_user_id"):
+                self.stdout.write(f"{current.access}\t{current.slack_user_id}")
+            return
+
+        if not slack_user_ids:
+            raise CommandError("Requires one or more Slack user IDs")
+
+        for current in slack_user_ids:
+            if action == "reset":
+                AccessListEntry.objects.filter(slack_user_id=current).delete()
+            else:
+                AccessListEntry.objects.update_or_create(
+                    slack_user_id=current, defaults={"access": action}
+                )
+
+        self.stdout.write(f"Applied '{action}' to {len(slack_user_ids)} Slack user(s)")
@@ -0,0 +1,252 @@
+"""
+Lightweight metrics, without any external dependencies. Values are collected in-process and periodically flushed to
+the database, so that the web app and Celery workers all end up in the same place. Exposed in Prometheus text format.
+"""
+import contextlib
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+
+botmydesk_logger = logging.getLogger("botmydesk")
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# Any metric used should be listed here.
+METRICS = {
+    "botmydesk_bookmydesk_requests_total": (
+        COUNTER,
+        "BookMyDesk API requests, by endpoint and HTTP status.",
+    ),
+    "botmydesk_bookmydesk_request_duration_seconds": (
+        HISTOGRAM,
+        "BookMyDesk API request duration, by endpoint.",
+    ),
+    "botmydesk_slack_requests_total": (
+        COUNTER,
+        "Slack API requests, by method and status.",
+    ),
+    "botmydesk_slack_request_duration_seconds": (
+        HISTOGRAM,
+        "Slack API request duration, by method.",
+    ),
+    "botmydesk_slack_callbacks_total": (
+        COUNTER,
+        "Slack callbacks processed (events, slash commands, interactivity), by type and status.",
+    ),
+    "botmydesk_slack_callback_duration_seconds": (
+        HISTOGRAM,
+        "Slack callback processing duration, by type.",
+    ),
+    "botmydesk_socket_mode_requests_total": (
+        COUNTER,
+        "Socket Mode requests, by connection and result (received/processed/failed/dropped).",
+    ),
+    "botmydesk_cache_requests_total": (
+        COUNTER,
+        "Cache lookups, by cache and result (hit/miss).",
+    ),
+    "botmydesk_app_home_updates_total": (
+        COUNTER,
+        "App home updates, by result (published/skipped).",
+    ),
+    "botmydesk_celery_queue_messages": (
+        GAUGE,
+        "Messages waiting in each Celery queue, at the time of scraping.",
+    ),
+    "botmydesk_tasks_total": (
+        COUNTER,
+        "Celery tasks run, by task and state.",
+    ),
+    "botmydesk_task_duration_seconds": (
+        HISTOGRAM,
+        "Celery task duration, by task.",
+    ),
+}
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+# The "le" label is always added last. See observe().
+BUCKET_LABELS_REGEX = re.compile(r'(?:(?P<labels>.*),)?le="(?P<le>[^"]*)"')
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()  # One flush at a time per process.
+_pending: Dict[Tuple[str, str], float] = defaultdict(float)
+_last_flush = time.monotonic()
+
+
+def increment(name: str, amount: float = 1, **labels):
+    """Increments a counter."""
+    _add(name, _format_labels(labels), amount)
+
+
+def observe(name: str, value: float, **labels):
+    """Records a value for a histogram, e.g. a duration in seconds."""
+    formatted_labels = _format_labels(labels)
+
+    with _lock:
+        # Buckets are cumulative. Empty ones are stored as well, as Prometheus expects all of them.
+        for bucket in BUCKETS:
+            _pending[
+                (f"{name}_bucket", _format_labels({**labels, "le": float(bucket)}))
+            ] += (1 if value <= bucket else 0)
+
+        _pending[(f"{name}_bucket", _format_labels({**labels, "le": "+Inf"}))] += 1
+        _pending[(f"{name}_sum", formatted_labels)] += value
+        _pending[(f"{name}_count", formatted_labels)] += 1
+
+
+@contextlib.contextmanager
+def timed(name: str, **labels):
+    """Records the duration of the block in the histogram given."""
+    start = time.monotonic()
+
+    try:
+        yield
+    finally:
+        observe(name, time.monotonic() - start, **labels)
+
+
+def flush_if_due():
+    """Flushes in the background, unless flushed recently. Call this often, e.g. after every request or task."""
+    global _last_flush
+
+    with _lock:
+        if time.monotonic() - _last_flush < settings.BOTMYDESK_METRICS_FLUSH_INTERVAL:
+            return
+
+        # Claimed here already, so concurrent callers do not start flushing as well.
+        _last_flush = time.monotonic()
+
+    # Never delays the caller, e.g. a Slack request, with any queries.
+    threading.Thread(target=_flush_in_background, daemon=True).start()
+
+
+def flush():
+    """Adds any values collected in this process to the ones stored."""
+    # Deferred, as this module is used by the Celery app as well, which is loaded before any models are.
+    from bmd_core.models import MetricValue
+
+    global _last_flush
+
+    with _flush_lock:
+        with _lock:
+            pending = dict(_pending)
+            _pending.clear()
+            _last_flush = time.monotonic()
+
+        try:
+            for (name, labels), value in list(pending.items()):
+                MetricValue.objects.add(name=name, labels=labels, value=value)
+                del pending[(name, labels)]
+        except Exception as error:
+            # Metrics should never break anything. Values not stored are retried on the next flush.
+            with _lock:
+                for key, value in pending.items():
+                    _pending[key] += value
+
+            botmydesk_logger.warning(f"Failed to flush metrics: {error}")
+
+
+def render_prometheus() -> str:
+    """All values stored, in Prometheus text format."""
+    from bmd_core.models import MetricValue
+
+    lines = []
+    current_family = None
+
+    for current in sorted(MetricValue.objects.all(), key=_sort_key):
+        family = _family(current.name)
+
+        if family != current_family:
+            current_family = family
+            metric_type, description = METRICS.get(family, ("untyped", ""))
+            lines.append(f"# HELP {family} {description}")
+            lines.append(f"# TYPE {family} {metric_type}")
+
+        labels = f"{{{current.labels}}}" if current.labels else ""
+        lines.append(f"{current.name}{labels} {current.value:g}")
+
+    queue_lengths = celery_queue_lengths()
+
+    if queue_lengths:
+        family = "botmydesk_celery_queue_messages"
+        metric_type, description = METRICS[family]
+        lines.append(f"# HELP {family} {description}")
+        lines.append(f"# TYPE {family} {metric_type}")
+        lines.extend(
+            f"{family}{{{_format_labels({'queue': queue})}}} {length}"
+            for queue, length in queue_lengths.items()
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def celery_queue_lengths() -> Dict[str, int]:
+    """Messages waiting per queue, as reported by the broker. Empty when the broker is unavailable."""
+    from botmydesk.celery import app, QUEUES
+
+    result = {}
+
+    try:
+        with app.connection_for_read() as connection:
+            connection.ensure_connection(max_retries=1)
+            channel = connection.default_channel
+
+            for current in QUEUES:
+                # Declares any queue not used yet, similar to workers.
+                _, message_count, _ = app.amqp.queues[current](channel).queue_declare()
+                result[current] = message_count
+    except Exception as error:
+        botmydesk_logger.warning(f"Failed to fetch Celery queue lengths: {error}")
+
+    return result
+
+
+def _flush_in_background():
+    try:
+        flush()
+    finally:
+        # Any DB connection opened is bound to this thread.
+        connections.close_all()
+
+
+def _add(name: str, labels: str, amount: float):
+    with _lock:
+        _pending[(name, labels)] += amount
+
+
+def _format_labels(labels: dict) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+def _sort_key(metric_value) -> tuple:
+    """Sorts by name and labels, but buckets in ascending order with "+Inf" last, as Prometheus expects."""
+    match = BUCKET_LABELS_REGEX.fullmatch(metric_value.labels)
+
+    if not metric_value.name.endswith("_bucket") or match is None:
+        return metric_value.name, metric_value.labels, 0.0
+
+    # Parses "+Inf" as well.
+    return metric_value.name, match.group("labels") or "", float(match.group("le"))
+
+
+def _family(name: str) -> str:
+    """Histograms consist of multiple series, e.g. "x_bucket", "x_sum" and "x_count"."""
+    for suffix in ("_bucket", "_sum", "_count"):
+        if (
+            name.endswith(suffix)
+            and METRICS.get(name[: -len(suffix)], ("",))[0] == HISTOGRAM
+        ):
+            return name[: -len(suffix)]
+
+    return name
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-18 23:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0004_alter_botmydeskuser_slack_tz"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="botmydeskuser",
+            name="next_slack_profile_update",
+            field=models.DateTimeField(db_index=True, default=None, null=True),
+        ),
+    ]
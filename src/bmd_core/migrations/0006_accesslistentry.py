@@ -0,0 +1,35 @@
+# Generated by Django 4.1.13 on 2026-10-18 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0005_alter_botmydeskuser_next_slack_profile_update"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccessListEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("slack_user_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "access",
+                    models.CharField(
+                        choices=[("allow", "allow"), ("deny", "deny")], max_length=16
+                    ),
+                ),
+            ],
+        ),
+    ]
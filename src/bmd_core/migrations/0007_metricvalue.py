@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-18 23:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0006_accesslistentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MetricValue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("labels", models.CharField(default="", max_length=255)),
+                ("value", models.FloatField(default=0)),
+            ],
+            options={
+                "unique_together": {("name", "labels")},
+            },
+        ),
+    ]
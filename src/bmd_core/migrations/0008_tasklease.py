@@ -0,0 +1,32 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0007_metricvalue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskLease",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("owner", models.CharField(default=None, max_length=255, null=True)),
+                ("acquired_at", models.DateTimeField(default=None, null=True)),
+                ("expires_at", models.DateTimeField(default=None, null=True)),
+                ("last_processed_pk", models.BigIntegerField(default=None, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0008_tasklease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="botmydeskuser",
+            name="reservations_synced_at",
+            field=models.DateTimeField(db_index=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="botmydeskuser",
+            name="reservations_synced_from",
+            field=models.DateField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="botmydeskuser",
+            name="reservations_synced_until",
+            field=models.DateField(default=None, null=True),
+        ),
+        migrations.CreateModel(
+            name="Reservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bookmydesk_id", models.CharField(max_length=255, unique=True)),
+                ("owner_id", models.CharField(max_length=255)),
+                ("date_start", models.DateTimeField()),
+                ("date_end", models.DateTimeField(db_index=True)),
+                ("status", models.CharField(max_length=32)),
+                ("reservation_type", models.CharField(max_length=32)),
+                ("seat_id", models.CharField(default=None, max_length=255, null=True)),
+                ("map_id", models.CharField(default=None, max_length=255, null=True)),
+                ("map_name", models.CharField(default=None, max_length=255, null=True)),
+                ("data", models.JSONField()),
+                ("synced_at", models.DateTimeField()),
+                (
+                    "botmydesk_user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="bmd_core.botmydeskuser",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["botmydesk_user", "date_start"],
+                name="bmd_core_re_botmyde_7334e3_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0009_reservation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="botmydeskuser",
+            name="reservations_hash",
+            field=models.CharField(default=None, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0010_botmydeskuser_reservations_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="botmydeskuser",
+            name="bookmydesk_company_id",
+            field=models.CharField(
+                db_index=True, default=None, max_length=255, null=True
+            ),
+        ),
+    ]
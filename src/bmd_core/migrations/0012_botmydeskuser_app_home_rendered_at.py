@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0011_botmydeskuser_bookmydesk_company_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="botmydeskuser",
+            name="app_home_rendered_at",
+            field=models.DateTimeField(default=None, null=True),
+        ),
+    ]
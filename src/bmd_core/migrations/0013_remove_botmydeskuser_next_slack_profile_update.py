@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0012_botmydeskuser_app_home_rendered_at"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="botmydeskuser",
+            name="next_slack_profile_update",
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.13 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0013_remove_botmydeskuser_next_slack_profile_update"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accesslistentry",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0014_accesslistentry_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="botmydeskuser",
+            name="bookmydesk_user_id",
+            field=models.CharField(default=None, max_length=255, null=True),
+        ),
+    ]
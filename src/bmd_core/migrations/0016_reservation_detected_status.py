@@ -0,0 +1,31 @@
+# Generated by Django 4.1.13 on 2026-10-19 12:30
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def detect_current_statuses(apps, schema_editor):
+    """Treats the statuses mirrored so far as seen, so changes from now on are detected."""
+    Reservation = apps.get_model("bmd_core", "Reservation")
+    Reservation.objects.update(detected_status=F("status"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0015_botmydeskuser_bookmydesk_user_id"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="botmydeskuser",
+            name="reservations_hash",
+        ),
+        migrations.AddField(
+            model_name="reservation",
+            name="detected_status",
+            field=models.CharField(default="", max_length=32),
+            preserve_default=False,
+        ),
+        migrations.RunPython(detect_current_statuses, migrations.RunPython.noop),
+    ]
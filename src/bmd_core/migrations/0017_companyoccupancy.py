@@ -0,0 +1,34 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0016_reservation_detected_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompanyOccupancy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bookmydesk_company_id", models.CharField(max_length=255)),
+                ("date", models.DateField()),
+                ("refreshed_at", models.DateTimeField()),
+                ("maps", models.JSONField()),
+            ],
+            options={
+                "unique_together": {("bookmydesk_company_id", "date")},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0017_companyoccupancy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("date", models.DateField()),
+                ("started_at", models.DateTimeField()),
+            ],
+            options={
+                "unique_together": {("name", "date")},
+            },
+        ),
+    ]
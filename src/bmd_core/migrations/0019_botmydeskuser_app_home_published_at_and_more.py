@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0018_dailyrun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="botmydeskuser",
+            name="app_home_published_at",
+            field=models.DateTimeField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="botmydeskuser",
+            name="app_home_published_hash",
+            field=models.CharField(default=None, max_length=64, null=True),
+        ),
+    ]
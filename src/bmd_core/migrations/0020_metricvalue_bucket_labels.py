@@ -0,0 +1,42 @@
+# Generated by Django 4.1.13 on 2026-10-19 14:10
+
+import re
+
+from django.db import migrations
+from django.db.models import F
+
+
+def format_bucket_labels(apps, schema_editor):
+    """Formats the "le" label of buckets stored so far as float, e.g. "1" as "1.0", merging any stored since."""
+    MetricValue = apps.get_model("bmd_core", "MetricValue")
+
+    for current in MetricValue.objects.filter(name__endswith="_bucket"):
+        match = re.fullmatch(r'(?:(.*),)?le="([^"]*)"', current.labels)
+
+        if match is None or match.group(2) == "+Inf":
+            continue
+
+        other_labels = f"{match.group(1)}," if match.group(1) else ""
+        labels = f'{other_labels}le="{float(match.group(2))}"'
+
+        if labels == current.labels:
+            continue
+
+        if MetricValue.objects.filter(name=current.name, labels=labels).update(
+            value=F("value") + current.value
+        ):
+            current.delete()
+        else:
+            current.labels = labels
+            current.save(update_fields=["labels"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bmd_core", "0019_botmydeskuser_app_home_published_at_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(format_bucket_labels, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,118 @@
+from typing import Iterable, List
+
+from django.core.exceptions import ValidationError
+
+
 class ModelUpdateMixin:
-    """Add update() on Django model instance, similar to queryset.update()."""
+    """
+    Add update() on Django model instance, similar to queryset.update(). Tracks the values last loaded from or saved to
+    the database, so updates not changing anything are skipped entirely.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
 
-    def update(self, **updated_fields):
-        if not updated_fields:
-            return
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._take_snapshot(kwargs.get("update_fields"))
 
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._take_snapshot(fields)
+
+    def update(self, force: bool = False, **updated_fields) -> bool:
+        """
+        Returns whether anything was written. Force writes meant to invalidate anything, as the values last loaded may
+        be outdated by now.
+        """
         for key, value in updated_fields.items():
             setattr(self, key, value)
 
-        self.save(update_fields=updated_fields.keys())
+        if force:
+            changed_fields = list(updated_fields.keys())
+        else:
+            changed_fields = self.dirty_fields(*updated_fields.keys())
+
+        if not changed_fields:
+            return False
+
+        self.save(update_fields=changed_fields)
+        return True
+
+    def dirty_fields(self, *field_names: str) -> List[str]:
+        """The fields given differing from the database. Unknown values, e.g. deferred fields, are considered dirty."""
+        snapshot = getattr(self, "_snapshot", {})
+        result = []
+
+        for current in field_names:
+            field = self._meta.get_field(current)
+
+            if field.attname not in snapshot:
+                result.append(current)
+                continue
+
+            try:
+                value = field.to_python(getattr(self, field.attname))
+            except ValidationError:
+                # Let the database decide.
+                result.append(current)
+                continue
+
+            if value != snapshot[field.attname]:
+                result.append(current)
+
+        return result
+
+    def _take_snapshot(self, field_names: Iterable[str] = None):
+        """Only copies loaded values, since accessing deferred fields would query them."""
+        if not hasattr(self, "_snapshot"):
+            self._snapshot = {}
+
+        if field_names is None:
+            fields = self._meta.concrete_fields
+        else:
+            fields = [self._meta.get_field(x) for x in field_names]
+
+        for current in fields:
+            if current.attname not in self.__dict__:
+                continue
+
+            # Values assigned may not have been converted yet, e.g. "09:00" for a time field.
+            try:
+                value = current.to_python(self.__dict__[current.attname])
+            except ValidationError:
+                value = self.__dict__[current.attname]
+
+            self._snapshot[current.attname] = value
+
+
+class BulkUpdateMixin:
+    """Add bulk_update_dirty() on Django model managers, for models using ModelUpdateMixin."""
+
+    def bulk_update_dirty(self, objs: Iterable, fields: Iterable[str]) -> list:
+        """Similar to bulk_update(), but only writes objects and fields changed. Returns the objects written."""
+        fields = tuple(fields)
+        dirty_objs = []
+        dirty_fields = set()
+
+        for current in objs:
+            current_dirty_fields = current.dirty_fields(*fields)
+
+            if current_dirty_fields:
+                dirty_objs.append(current)
+                dirty_fields.update(current_dirty_fields)
+
+        if not dirty_objs:
+            return []
+
+        # Keep the field order stable, for consistent queries.
+        dirty_fields = [x for x in fields if x in dirty_fields]
+        self.bulk_update(dirty_objs, fields=dirty_fields)
+
+        for current in dirty_objs:
+            current._take_snapshot(dirty_fields)
+
+        return dirty_objs
@@ -1,17 +1,29 @@
+import datetime
 import zoneinfo
+from typing import Iterable
 
 from django.db import models
-from django.db.models import QuerySet, Q
+from django.db.models import Count, F, Max, QuerySet, Q
 from django.utils import timezone
 
-from bmd_core.mixins import ModelUpdateMixin
+from bmd_core.mixins import BulkUpdateMixin, ModelUpdateMixin
+import bmd_api_client.dto
 
 
-class BotMyDeskSlackUserManager(models.Manager):
+class BotMyDeskSlackUserManager(BulkUpdateMixin, models.Manager):
     def with_session(self) -> QuerySet:
         """Returns users with any session."""
         return self.filter(bookmydesk_refresh_token__isnull=False)
 
+    def timezones(self) -> QuerySet:
+        """Distinct timezones of users with any session, e.g. to process users per local time."""
+        return (
+            self.with_session()
+            .values("slack_tz")
+            .distinct()
+            .values_list("slack_tz", flat=True)
+        )
+
     def eligible_for_notification(self, user_timezone: str) -> QuerySet:
         """Specifically checks for users eligible in the given timezone."""
         local_now = timezone.localtime(timezone.now(), zoneinfo.ZoneInfo(user_timezone))
@@ -66,6 +78,23 @@ class BotMyDeskUser(ModelUpdateMixin, models.Model):
 
     objects = BotMyDeskSlackUserManager()
 
+    # The bare minimum for performing any BookMyDesk calls or Slack messages for the user, e.g. in sweeps.
+    SESSION_FIELDS = (
+        "slack_user_id",
+        "slack_email",
+        "slack_name",
+        "slack_tz",
+        "preferred_locale",
+        "bookmydesk_access_token",
+        "bookmydesk_access_token_expires_at",
+        "bookmydesk_refresh_token",
+        "bookmydesk_user_id",
+        "bookmydesk_company_id",
+        "reservations_synced_at",
+        "reservations_synced_from",
+        "reservations_synced_until",
+    )
+
     # id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)  # @TDO later
     created_at = models.DateTimeField(auto_now=True)
 
@@ -74,14 +103,18 @@ class BotMyDeskUser(ModelUpdateMixin, models.Model):
     slack_email = models.EmailField(max_length=255)
     slack_name = models.CharField(max_length=255)
     slack_tz = models.CharField(max_length=64, db_index=True)
-    next_slack_profile_update = models.DateTimeField(
-        auto_now=True
-    )  # Whenever we update profile info here.
 
     # BMD data
     bookmydesk_access_token = models.CharField(null=True, default=None, max_length=255)
     bookmydesk_access_token_expires_at = models.DateTimeField(null=True, default=None)
     bookmydesk_refresh_token = models.CharField(null=True, default=None, max_length=255)
+    # Of the user themselves, as last seen. Tells their own reservations apart from those of delegates, without any
+    # upstream calls.
+    bookmydesk_user_id = models.CharField(null=True, default=None, max_length=255)
+    # Of the first company found, as last seen. Allows company-wide data to be shared without any upstream calls.
+    bookmydesk_company_id = models.CharField(
+        null=True, default=None, max_length=255, db_index=True
+    )
 
     # User preferences
     preferred_locale = models.CharField(
@@ -100,6 +133,18 @@ class BotMyDeskUser(ModelUpdateMixin, models.Model):
         null=True, default=None, db_index=True
     )
 
+    # Window of local dates in the reservations mirror, end exclusive. See bmd_core.reservations.
+    reservations_synced_at = models.DateTimeField(
+        null=True, default=None, db_index=True
+    )
+    reservations_synced_from = models.DateField(null=True, default=None)
+    reservations_synced_until = models.DateField(null=True, default=None)
+    # Claimed when the app home is rendered, shared by all processes, as users tend to switch tabs a lot.
+    app_home_rendered_at = models.DateTimeField(null=True, default=None)
+    # Last app home view published, shared by all processes as well, so identical views are not published again.
+    app_home_published_hash = models.CharField(max_length=64, null=True, default=None)
+    app_home_published_at = models.DateTimeField(null=True, default=None)
+
     def has_authorized_bot(self) -> bool:
         """Whether the bot is authorized for this user (has session)."""
         return self.bookmydesk_refresh_token is not None
@@ -111,10 +156,6 @@ class BotMyDeskUser(ModelUpdateMixin, models.Model):
             or self.bookmydesk_access_token_expires_at <= timezone.now()
         )
 
-    def profile_data_expired(self) -> bool:
-        """Whether the profile data needs to be refreshed."""
-        return self.next_slack_profile_update <= timezone.now()
-
     def user_tz_instance(self) -> zoneinfo.ZoneInfo:
         return zoneinfo.ZoneInfo(str(self.slack_tz))
 
@@ -123,7 +164,218 @@ class BotMyDeskUser(ModelUpdateMixin, models.Model):
             bookmydesk_access_token=None,
             bookmydesk_access_token_expires_at=None,
             bookmydesk_refresh_token=None,
+            force=True,
         )
 
     def touch_last_notification_sent(self):
         self.last_notification_sent = timezone.now()
+
+
+class AccessListEntry(models.Model):
+    """Slack users explicitly allowed or denied to use the bot. Any change is picked up by all processes."""
+
+    ALLOW = "allow"
+    DENY = "deny"
+    ACCESS_CHOICES = (
+        (ALLOW, ALLOW),
+        (DENY, DENY),
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    slack_user_id = models.CharField(unique=True, max_length=255)
+    access = models.CharField(max_length=16, choices=ACCESS_CHOICES)
+
+    @classmethod
+    def current_version(cls) -> str:
+        """Changes whenever entries are added, changed or deleted. Bulk updates should set updated_at themselves."""
+        result = cls.objects.aggregate(count=Count("id"), updated_at=Max("updated_at"))
+        return f"{result['count']}:{result['updated_at']}"
+
+
+class MetricValueManager(models.Manager):
+    def add(self, name: str, labels: str, value: float):
+        """Atomically adds the value given, as multiple processes flush concurrently."""
+        if self.filter(name=name, labels=labels).update(value=F("value") + value):
+            return
+
+        self.get_or_create(name=name, labels=labels)
+        self.filter(name=name, labels=labels).update(value=F("value") + value)
+
+
+class MetricValue(models.Model):
+    """Metric values collected by any process. See bmd_core.metrics."""
+
+    objects = MetricValueManager()
+
+    name = models.CharField(max_length=255)
+    labels = models.CharField(max_length=255, default="")  # E.g. 'task="x",le="0.5"'
+    value = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("name", "labels")
+
+
+class TaskLeaseManager(models.Manager):
+    def acquire(self, name: str, owner: str, ttl: int) -> bool:
+        """Atomically claims the lease, unless held and not yet expired. Returns whether acquired."""
+        now = timezone.now()
+        self.get_or_create(name=name)
+
+        return bool(
+            self.filter(name=name)
+            .filter(
+                Q(expires_at__isnull=True) | Q(expires_at__lte=now) | Q(owner=owner)
+            )
+            .update(
+                owner=owner,
+                acquired_at=now,
+                expires_at=now + timezone.timedelta(seconds=ttl),
+            )
+        )
+
+
+class TaskLease(models.Model):
+    """Prevents long-running tasks from overlapping. See bmd_core.leases."""
+
+    objects = TaskLeaseManager()
+
+    name = models.CharField(unique=True, max_length=255)
+    owner = models.CharField(null=True, default=None, max_length=255)
+    acquired_at = models.DateTimeField(null=True, default=None)
+    expires_at = models.DateTimeField(null=True, default=None)
+    # Checkpoint of an unfinished sweep, to resume at after a crash or time limit.
+    last_processed_pk = models.BigIntegerField(null=True, default=None)
+
+
+class DailyRunManager(models.Manager):
+    def start(self, name: str, date: datetime.date) -> "DailyRun":
+        """The run of the date given, started now unless started before."""
+        result, _ = self.get_or_create(
+            name=name, date=date, defaults={"started_at": timezone.now()}
+        )
+        return result
+
+
+class DailyRun(models.Model):
+    """Runs of tasks done once a day, e.g. per timezone. Shared by all processes, unlike the cache."""
+
+    objects = DailyRunManager()
+
+    name = models.CharField(max_length=255)
+    date = models.DateField()
+    started_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("name", "date")
+
+
+class CompanyOccupancy(models.Model):
+    """Who's in the office per company and local date, shared by all processes. See bmd_core.occupancy."""
+
+    bookmydesk_company_id = models.CharField(max_length=255)
+    date = models.DateField()
+    refreshed_at = models.DateTimeField()
+    maps = models.JSONField()  # E.g. [{"name": "Floor 1", "people": ["Jane Doe"]}]
+
+    class Meta:
+        unique_together = ("bookmydesk_company_id", "date")
+
+
+class ReservationManager(models.Manager):
+    def store(
+        self,
+        botmydesk_user: BotMyDeskUser,
+        reservations: Iterable[bmd_api_client.dto.Reservation],
+    ):
+        """Inserts or updates the reservations given, in bulk."""
+        now = timezone.now()
+        self.bulk_create(
+            [
+                Reservation.from_dto(botmydesk_user, x, synced_at=now)
+                for x in reservations
+            ],
+            update_conflicts=True,
+            unique_fields=["bookmydesk_id"],
+            update_fields=[
+                "botmydesk_user",
+                "owner_id",
+                "date_start",
+                "date_end",
+                "status",
+                "reservation_type",
+                "seat_id",
+                "map_id",
+                "map_name",
+                "data",
+                "synced_at",
+            ],
+        )
+
+
+class Reservation(models.Model):
+    """Local mirror of BookMyDesk reservations, so reads require no upstream calls. See bmd_core.reservations."""
+
+    objects = ReservationManager()
+
+    bookmydesk_id = models.CharField(unique=True, max_length=255)
+    botmydesk_user = models.ForeignKey(
+        BotMyDeskUser, on_delete=models.CASCADE, related_name="reservations"
+    )
+    owner_id = models.CharField(
+        max_length=255
+    )  # BookMyDesk user ID, differs for delegates
+    date_start = models.DateTimeField()
+    date_end = models.DateTimeField(db_index=True)
+    status = models.CharField(max_length=32)
+    # As last seen by the change detector, untouched by syncs. See bmd_core.reservations.detect_changes().
+    detected_status = models.CharField(max_length=32)
+    reservation_type = models.CharField(max_length=32)
+    seat_id = models.CharField(null=True, default=None, max_length=255)
+    map_id = models.CharField(null=True, default=None, max_length=255)
+    map_name = models.CharField(null=True, default=None, max_length=255)
+    data = models.JSONField()  # As received, for the DTO.
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["botmydesk_user", "date_start"])]
+
+    @classmethod
+    def from_dto(
+        cls,
+        botmydesk_user: BotMyDeskUser,
+        reservation: bmd_api_client.dto.Reservation,
+        synced_at: timezone.datetime,
+    ) -> "Reservation":
+        seat = reservation.seat()
+
+        return cls(
+            bookmydesk_id=reservation.id(),
+            botmydesk_user=botmydesk_user,
+            owner_id=reservation.owner_id(),
+            date_start=_aware(reservation.date_start(), botmydesk_user),
+            date_end=_aware(reservation.date_end(), botmydesk_user),
+            status=reservation.status(),
+            # Only applies to new ones, as storing never updates it.
+            detected_status=reservation.status(),
+            reservation_type=reservation.type(),
+            seat_id=seat and seat.id(),
+            map_id=seat and seat.map_id(),
+            map_name=seat and seat.map_name(),
+            data=reservation.data(),
+            synced_at=synced_at,
+        )
+
+    def as_dto(self) -> bmd_api_client.dto.Reservation:
+        """Status changes made locally are reflected as well."""
+        return bmd_api_client.dto.Reservation({**self.data, "status": self.status})
+
+
+def _aware(
+    value: timezone.datetime, botmydesk_user: BotMyDeskUser
+) -> timezone.datetime:
+    """Naive dates are assumed to be local."""
+    if timezone.is_naive(value):
+        return timezone.make_aware(value, botmydesk_user.user_tz_instance())
+
+    return value
@@ -0,0 +1,117 @@
+"""
+Company-wide office occupancy of today, e.g. for who's in the office. Computing it requires all reservations of the
+company, so a snapshot per company and local date is refreshed in the background and shared by anyone in that company.
+Reads never call BookMyDesk.
+"""
+import datetime
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from bmd_core.models import BotMyDeskUser, CompanyOccupancy
+import bmd_api_client.client
+
+
+botmydesk_logger = logging.getLogger("botmydesk")
+
+
+def snapshot(botmydesk_user: BotMyDeskUser) -> Optional[dict]:
+    """The snapshot of the company of the user for the user's today, unless missing or outdated."""
+    if botmydesk_user.bookmydesk_company_id is None:
+        return None
+
+    try:
+        result = CompanyOccupancy.objects.get(
+            bookmydesk_company_id=botmydesk_user.bookmydesk_company_id,
+            date=_local_today(botmydesk_user),
+            refreshed_at__gt=timezone.now()
+            - timezone.timedelta(seconds=settings.BOTMYDESK_OCCUPANCY_TTL),
+        )
+    except CompanyOccupancy.DoesNotExist:
+        return None
+
+    return {
+        "date": result.date,
+        "refreshed_at": result.refreshed_at,
+        "maps": result.maps,
+    }
+
+
+def refresh(
+    botmydesk_user: BotMyDeskUser, date: Optional[datetime.date] = None
+) -> dict:
+    """
+    Refreshes the snapshot of the company of the user given for the date given, using their session. The user's today
+    by default. Office reservations are grouped per map, in the order of the company's locations.
+    """
+    company_id = bmd_api_client.client.me_v3(botmydesk_user).first_company_id()
+    company = bmd_api_client.client.company_extended_v3(botmydesk_user)
+    date = date or _local_today(botmydesk_user)
+
+    map_names = {}
+
+    for current_location in company.locations():
+        if current_location.name() == settings.BOTMYDESK_WORK_EXTERNALLY_LOCATION_NAME:
+            continue
+
+        for current_map in current_location.maps():
+            map_names[current_map.id()] = current_map.name()
+
+    people_per_map = {x: set() for x in map_names}
+
+    for current in bmd_api_client.client.iterate_reservations_v3(
+        botmydesk_user,
+        prefetch=True,
+        **{
+            "userId": None,  # Anyone in the company.
+            "includeAnonymous": "false",
+            "type": "normal",
+            "from": date,
+            "to": date + timezone.timedelta(days=1),
+        },
+    ):
+        if current.status() not in ("reserved", "checkedIn"):
+            continue
+
+        if current.seat() is None or current.seat().map_id() not in people_per_map:
+            continue
+
+        if current.owner_name() is None:
+            continue
+
+        people_per_map[current.seat().map_id()].add(current.owner_name())
+
+    result = {
+        "date": date,
+        "refreshed_at": timezone.now(),
+        "maps": [
+            {"name": map_names[x], "people": sorted(people)}
+            for x, people in people_per_map.items()
+        ],
+    }
+    CompanyOccupancy.objects.update_or_create(
+        bookmydesk_company_id=company_id,
+        date=date,
+        defaults={"refreshed_at": result["refreshed_at"], "maps": result["maps"]},
+    )
+
+    botmydesk_logger.debug(
+        f"Refreshed occupancy of company {company_id} on {date}: {sum(len(x['people']) for x in result['maps'])} people"
+    )
+    return result
+
+
+def purge_past_snapshots() -> int:
+    """Removes snapshots of dates passed in any timezone. Returns the number removed."""
+    deleted_count, _ = CompanyOccupancy.objects.filter(
+        date__lt=timezone.now().date() - timezone.timedelta(days=1)
+    ).delete()
+    return deleted_count
+
+
+def _local_today(botmydesk_user: BotMyDeskUser) -> datetime.date:
+    return timezone.localtime(
+        timezone.now(), timezone=botmydesk_user.user_tz_instance()
+    ).date()
@@ -0,0 +1,113 @@
+"""
+Opt-in sampling profiler for slow requests. While enabled for a request, a background thread samples the stack of the
+request thread periodically. Requests exceeding the latency threshold have their stacks dumped in the "collapsed"
+format, ready for flamegraph tools (e.g. "flamegraph.pl" or speedscope).
+"""
+import contextlib
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+
+botmydesk_logger = logging.getLogger("botmydesk")
+
+
+class SamplingProfiler:
+    """Samples the stack of a single thread, counting identical stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self._sampler.join()
+        return self.stacks
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+
+            if frame is None:
+                return
+
+            stack = []
+
+            while frame is not None:
+                stack.append(
+                    f"{frame.f_globals.get('__name__')}.{frame.f_code.co_qualname}"
+                )
+                frame = frame.f_back
+
+            self.stacks[";".join(reversed(stack))] += 1
+
+
+def should_profile(slack_user_id: Optional[str]) -> bool:
+    """Either for specific users or a random sample of all requests."""
+    if slack_user_id in settings.BOTMYDESK_PROFILING_SLACK_USER_IDS:
+        return True
+
+    return random.random() < settings.BOTMYDESK_PROFILING_SAMPLE_RATE
+
+
+@contextlib.contextmanager
+def profile(label: str, slack_user_id: Optional[str]):
+    """Profiles the block when applicable. Dumps the stacks sampled when it took longer than the threshold."""
+    if not should_profile(slack_user_id):
+        yield
+        return
+
+    profiler = SamplingProfiler(
+        thread_id=threading.get_ident(),
+        interval=settings.BOTMYDESK_PROFILING_INTERVAL_MS / 1000,
+    )
+    start = time.monotonic()
+    profiler.start()
+
+    try:
+        yield
+    finally:
+        stacks = profiler.stop()
+        duration_ms = (time.monotonic() - start) * 1000
+
+        if duration_ms >= settings.BOTMYDESK_PROFILING_THRESHOLD_MS:
+            _dump(label, slack_user_id, duration_ms, stacks)
+
+
+def _dump(
+    label: str, slack_user_id: Optional[str], duration_ms: float, stacks: Counter
+):
+    file_name = os.path.join(
+        settings.BOTMYDESK_PROFILING_DIRECTORY,
+        f"{timezone.now():%Y%m%d-%H%M%S-%f}_{label}_{slack_user_id}.folded",
+    )
+
+    try:
+        os.makedirs(settings.BOTMYDESK_PROFILING_DIRECTORY, exist_ok=True)
+
+        with open(file_name, "w") as profile_file:
+            profile_file.writelines(
+                f"{stack} {count}\n" for stack, count in stacks.items()
+            )
+    except OSError as error:
+        # Profiling should never break anything.
+        botmydesk_logger.warning(f"Failed to write profile {file_name}: {error}")
+        return
+
+    botmydesk_logger.info(
+        f"Slow {label} of @{slack_user_id} took {duration_ms:.0f} ms, profile written to: {file_name}"
+    )
@@ -0,0 +1,265 @@
+"""
+Local mirror of the BookMyDesk reservations of each user, so reads require no upstream calls. The mirror covers a
+window of days starting today, synced in the background and updated by any changes we make ourselves. Reads outside
+the window, or older than BOTMYDESK_RESERVATIONS_MAX_AGE, sync the mirror on the fly instead.
+"""
+import datetime
+import logging
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from bmd_core.models import BotMyDeskUser, Reservation
+import bmd_api_client.client
+import bmd_api_client.dto
+
+
+botmydesk_logger = logging.getLogger("botmydesk")
+
+# Reservations with these statuses are no longer of any use to their user.
+ENDED_STATUSES = ("cancelled", "expired")
+
+
+def reservations(
+    botmydesk_user: BotMyDeskUser,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+) -> List[bmd_api_client.dto.Reservation]:
+    """Reservations of the user starting on the local dates given, end exclusive. Today only by default."""
+    start = start or _local_today(botmydesk_user)
+    end = end or start + datetime.timedelta(days=1)
+
+    if not is_fresh(botmydesk_user, start, end):
+        window_start, window_end = default_window(botmydesk_user)
+        sync(botmydesk_user, min(start, window_start), max(end, window_end))
+
+    return [
+        x.as_dto()
+        for x in Reservation.objects.filter(
+            botmydesk_user=botmydesk_user,
+            date_start__gte=_local_midnight(botmydesk_user, start),
+            date_start__lt=_local_midnight(botmydesk_user, end),
+        ).order_by("date_start")
+    ]
+
+
+def is_fresh(
+    botmydesk_user: BotMyDeskUser, start: datetime.date, end: datetime.date
+) -> bool:
+    """Whether the mirror covers the local dates given and was synced recently enough."""
+    if botmydesk_user.reservations_synced_at is None:
+        return False
+
+    max_age = timezone.timedelta(seconds=settings.BOTMYDESK_RESERVATIONS_MAX_AGE)
+
+    return (
+        botmydesk_user.reservations_synced_at > timezone.now() - max_age
+        and botmydesk_user.reservations_synced_from <= start
+        and end <= botmydesk_user.reservations_synced_until
+    )
+
+
+def default_window(botmydesk_user: BotMyDeskUser) -> tuple:
+    """The local dates mirrored for the user, end exclusive."""
+    today = _local_today(botmydesk_user)
+    return today, today + datetime.timedelta(
+        days=settings.BOTMYDESK_RESERVATIONS_WINDOW_DAYS
+    )
+
+
+def sync(
+    botmydesk_user: BotMyDeskUser,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+):
+    """Replaces the mirror of the user for the local dates given with the upstream reservations. Default window if omitted."""
+    if start is None or end is None:
+        start, end = default_window(botmydesk_user)
+
+    synced_at = timezone.now()
+    upstream_reservations = _fetch(botmydesk_user, start, end)
+
+    with transaction.atomic():
+        _replace(botmydesk_user, start, end, upstream_reservations)
+        botmydesk_user.update(
+            reservations_synced_at=synced_at,
+            reservations_synced_from=start,
+            reservations_synced_until=end,
+        )
+
+    botmydesk_logger.debug(
+        f"Synced {len(upstream_reservations)} reservation(s) of @{botmydesk_user.slack_user_id} from {start} until {end}"
+    )
+
+
+def detect_changes(
+    botmydesk_user: BotMyDeskUser,
+) -> List[bmd_api_client.dto.Reservation]:
+    """
+    Polls today's reservations of the user, returning those expired or cancelled since the detector last saw them.
+    What it saw is tracked apart from the mirror, as syncs may update the mirror first. Only changes are written.
+    """
+    start = _local_today(botmydesk_user)
+    end = start + datetime.timedelta(days=1)
+    upstream_reservations = _fetch(botmydesk_user, start, end)
+
+    known_statuses = {
+        x: (status, detected_status)
+        for x, status, detected_status in Reservation.objects.filter(
+            botmydesk_user=botmydesk_user,
+            date_start__gte=_local_midnight(botmydesk_user, start),
+            date_start__lt=_local_midnight(botmydesk_user, end),
+        ).values_list("bookmydesk_id", "status", "detected_status")
+    }
+    changed_reservations = [
+        x
+        for x in upstream_reservations
+        if x.status() in ENDED_STATUSES
+        and known_statuses.get(x.id(), (None, None))[1] not in (None, *ENDED_STATUSES)
+    ]
+    mirror_outdated = {x: status for x, (status, _) in known_statuses.items()} != {
+        x.id(): x.status() for x in upstream_reservations
+    }
+    undetected_reservations = [
+        x
+        for x in upstream_reservations
+        if x.id() in known_statuses and known_statuses[x.id()][1] != x.status()
+    ]
+
+    with transaction.atomic():
+        if mirror_outdated:
+            _replace(botmydesk_user, start, end, upstream_reservations)
+
+        for current in undetected_reservations:
+            Reservation.objects.filter(bookmydesk_id=current.id()).update(
+                detected_status=current.status()
+            )
+
+    return changed_reservations
+
+
+def check_out_today(
+    botmydesk_user: BotMyDeskUser,
+) -> List[bmd_api_client.dto.Reservation]:
+    """Checks out of any of today's reservations still checked in upstream. Returns those checked out."""
+    start = _local_today(botmydesk_user)
+    end = start + datetime.timedelta(days=1)
+    upstream_reservations = _fetch(botmydesk_user, start, end)
+
+    # Corrects the mirror as well, so users checked out elsewhere meanwhile are not checked again.
+    with transaction.atomic():
+        _replace(botmydesk_user, start, end, upstream_reservations)
+
+    checked_in_reservations = [
+        x for x in upstream_reservations if x.status() == "checkedIn"
+    ]
+
+    for current in checked_in_reservations:
+        check_in_out(botmydesk_user, current.id(), check_in=False)
+
+    return checked_in_reservations
+
+
+def owner_id(botmydesk_user: BotMyDeskUser) -> str:
+    """The BookMyDesk ID of the user, to tell their own reservations apart from those of delegates. Fetched if unknown."""
+    if botmydesk_user.bookmydesk_user_id is None:
+        # Stores it.
+        bmd_api_client.client.me_v3(botmydesk_user)
+
+    return botmydesk_user.bookmydesk_user_id
+
+
+def invalidate(botmydesk_user: BotMyDeskUser):
+    """Forces the next read to sync, e.g. after changes we cannot reflect locally."""
+    botmydesk_user.update(reservations_synced_at=None, force=True)
+
+
+def create(
+    botmydesk_user: BotMyDeskUser,
+    reservation_type: str,
+    start: timezone.datetime,
+    end: timezone.datetime,
+    seat_id: Optional[str] = None,
+) -> str:
+    """Creates the reservation upstream. Returns its ID."""
+    reservation_id = bmd_api_client.client.create_reservation_v3(
+        botmydesk_user=botmydesk_user,
+        reservation_type=reservation_type,
+        start=start,
+        end=end,
+        seat_id=seat_id,
+    )
+
+    # The API only returns the ID, so the next read fetches the rest.
+    invalidate(botmydesk_user)
+    return reservation_id
+
+
+def check_in_out(botmydesk_user: BotMyDeskUser, reservation_id: str, check_in: bool):
+    """Checks in or out upstream, reflecting it locally."""
+    bmd_api_client.client.reservation_check_in_out(
+        botmydesk_user, reservation_id, check_in=check_in
+    )
+    updated_count = Reservation.objects.filter(
+        botmydesk_user=botmydesk_user, bookmydesk_id=reservation_id
+    ).update(status="checkedIn" if check_in else "checkedOut")
+
+    if not updated_count:
+        invalidate(botmydesk_user)
+
+
+def delete(botmydesk_user: BotMyDeskUser, reservation_id: str):
+    """Deletes the reservation upstream and locally."""
+    bmd_api_client.client.delete_reservation_v3(botmydesk_user, reservation_id)
+    Reservation.objects.filter(
+        botmydesk_user=botmydesk_user, bookmydesk_id=reservation_id
+    ).delete()
+
+
+def purge_past_reservations() -> int:
+    """Removes reservations that ended before yesterday, as nothing reads them. Returns the number removed."""
+    deleted_count, _ = Reservation.objects.filter(
+        date_end__lt=timezone.now() - timezone.timedelta(days=1)
+    ).delete()
+    return deleted_count
+
+
+def _fetch(
+    botmydesk_user: BotMyDeskUser, start: datetime.date, end: datetime.date
+) -> List[bmd_api_client.dto.Reservation]:
+    return list(
+        bmd_api_client.client.iterate_reservations_v3(
+            botmydesk_user, prefetch=True, **{"from": start, "to": end}
+        )
+    )
+
+
+def _replace(
+    botmydesk_user: BotMyDeskUser,
+    start: datetime.date,
+    end: datetime.date,
+    upstream_reservations: List[bmd_api_client.dto.Reservation],
+):
+    """Replaces the mirror for the local dates given. Anything no longer upstream was deleted meanwhile."""
+    Reservation.objects.filter(
+        botmydesk_user=botmydesk_user,
+        date_start__gte=_local_midnight(botmydesk_user, start),
+        date_start__lt=_local_midnight(botmydesk_user, end),
+    ).exclude(bookmydesk_id__in=[x.id() for x in upstream_reservations]).delete()
+    Reservation.objects.store(botmydesk_user, upstream_reservations)
+
+
+def _local_today(botmydesk_user: BotMyDeskUser) -> datetime.date:
+    return timezone.localtime(
+        timezone.now(), timezone=botmydesk_user.user_tz_instance()
+    ).date()
+
+
+def _local_midnight(
+    botmydesk_user: BotMyDeskUser, date: datetime.date
+) -> timezone.datetime:
+    return timezone.datetime.combine(
+        date, datetime.time(), tzinfo=botmydesk_user.user_tz_instance()
+    )
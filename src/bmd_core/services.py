@@ -1,78 +1,109 @@
-import locale
+import datetime
+import hashlib
+import json
 import logging
+import time
 from typing import Optional
 
-from slack_sdk.web import WebClient
-from django.utils import timezone, translation
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import WebClient, SlackResponse
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import formats, timezone, translation
 from django.utils.translation import gettext, ngettext
 from django.conf import settings
 
-from bmd_core.models import BotMyDeskUser
+from bmd_core.models import AccessListEntry, BotMyDeskUser
 from bmd_api_client.exceptions import BookMyDeskException
 import bmd_api_client.client
+import bmd_core.concurrency
+import bmd_core.metrics
+import bmd_core.occupancy
+import bmd_core.reservations
+import bmd_core.tasks
+import bmd_core.tracing
+import bmd_core.view_templates
 
 
 botmydesk_logger = logging.getLogger("botmydesk")
 
 
 def slack_web_client() -> WebClient:
-    return WebClient(token=settings.SLACK_BOT_TOKEN)
+    return _InstrumentedWebClient(
+        token=settings.SLACK_BOT_TOKEN, base_url=settings.SLACK_API_URL
+    )
 
 
 def get_botmydesk_user(slack_user_id: str) -> BotMyDeskUser:
-    """Fetches Slack user info and creates/updates the user info on our side."""
+    """
+    Fetches the user on our side. Only new users have their Slack info fetched on the fly, as it's quite expensive.
+    The profile info of existing users is refreshed in the background instead.
+    """
     try:
         # Ensure every user is known internally.
-        botmydesk_user = BotMyDeskUser.objects.by_slack_id(slack_user_id=slack_user_id)
+        return BotMyDeskUser.objects.by_slack_id(slack_user_id=slack_user_id)
     except BotMyDeskUser.DoesNotExist:
-        botmydesk_user = None
+        pass
 
-    # Profile sync on each request is quite expensive, so once in a while suffices.
-    if botmydesk_user is not None and botmydesk_user.profile_data_expired():
-        return botmydesk_user
+    profile_data = _fetch_slack_profile_data(slack_user_id)
 
-    # Fetch Slack info for user.
-    users_info_result = slack_web_client().users_info(
-        user=slack_user_id, include_locale=True
+    # First-time/new user.
+    botmydesk_logger.debug(f"Creating new user: {slack_user_id}")
+    return BotMyDeskUser.objects.create(slack_user_id=slack_user_id, **profile_data)
+
+
+def update_slack_profile(botmydesk_user: BotMyDeskUser, slack_user: dict):
+    """Data sync existing user with Slack user info given, e.g. from events. Updates anything depending on it as well."""
+    profile_data = slack_profile_data(slack_user, botmydesk_user)
+    timezone_changed = profile_data["slack_tz"] != botmydesk_user.slack_tz
+    display_changed = (
+        profile_data["slack_name"] != botmydesk_user.slack_name or timezone_changed
     )
-    users_info_result.validate()
-    botmydesk_logger.debug(f"Users info result: {users_info_result}")
 
-    email_address = users_info_result.get("user")["profile"]["email"]
-    first_name = users_info_result.get("user")["profile"]["first_name"]
-    tz = users_info_result.get("user")["tz"]
+    botmydesk_logger.debug(f"Updating existing user: {botmydesk_user.slack_user_id}")
+    botmydesk_user.update(**profile_data)
 
-    next_profile_update = timezone.now() + timezone.timedelta(hours=1)
+    # The reservations mirror covers local dates, which shifted.
+    if timezone_changed:
+        bmd_core.reservations.invalidate(botmydesk_user)
 
-    # First-time/new user.
-    if botmydesk_user is None:
-        botmydesk_logger.debug(f"Creating new user: {slack_user_id}")
-        botmydesk_user = BotMyDeskUser.objects.create(
-            slack_user_id=slack_user_id,
-            slack_email=email_address,
-            slack_name=first_name,
-            slack_tz=tz,
-            next_slack_profile_update=next_profile_update,
-        )
-    else:
-        botmydesk_logger.debug(f"Updating existing user: {slack_user_id}")
-        # Data sync existing user.
-        botmydesk_user.update(
-            slack_email=email_address,
-            slack_name=first_name,
-            slack_tz=tz,
-            next_slack_profile_update=next_profile_update,
-        )
+    # The app home displays both name and local dates.
+    if display_changed:
+        schedule_app_home_update(botmydesk_user)
+
+
+def slack_profile_data(
+    slack_user: dict, botmydesk_user: Optional[BotMyDeskUser] = None
+) -> dict:
+    """Our user fields from Slack user info, e.g. from users.info or users.list. Missing data falls back to the user."""
+    return {
+        "slack_email": slack_user["profile"].get(
+            "email", botmydesk_user and botmydesk_user.slack_email
+        ),
+        "slack_name": slack_user["profile"].get(
+            "first_name", botmydesk_user and botmydesk_user.slack_name
+        ),
+        "slack_tz": slack_user.get("tz", botmydesk_user and botmydesk_user.slack_tz),
+    }
+
+
+def _fetch_slack_profile_data(slack_user_id: str) -> dict:
+    users_info_result = slack_web_client().users_info(
+        user=slack_user_id, include_locale=True
+    )
+    users_info_result.validate()
+    botmydesk_logger.debug("Users info result: %s", users_info_result)
 
-    return botmydesk_user
+    return slack_profile_data(users_info_result.get("user"))
 
 
 def validate_botmydesk_user(slack_user_id: str):
-    """Whitelist check."""
-    if not settings.BOTMYDESK_WHITELISTED_SLACK_IDS:
-        return
+    """Allowlist/denylist check. Requires no database lookup, unless the lists changed."""
+    allowed_slack_user_ids, denied_slack_user_ids = _access_lists()
 
-    if slack_user_id in settings.BOTMYDESK_WHITELISTED_SLACK_IDS:
+    if slack_user_id not in denied_slack_user_ids and (
+        not allowed_slack_user_ids or slack_user_id in allowed_slack_user_ids
+    ):
         return
 
     raise EnvironmentError(
@@ -82,14 +113,55 @@ def validate_botmydesk_user(slack_user_id: str):
     )
 
 
+# In-process copy of the access lists, along with the version it reflects.
+_access_list_cache = {
+    "version": None,
+    "checked_at": None,
+    "allowed": frozenset(),
+    "denied": frozenset(),
+}
+
+
+def _access_lists() -> tuple:
+    """Allowed and denied Slack user IDs. Only reloads when the version changed, which is checked once in a while."""
+    now = time.monotonic()
+
+    if (
+        _access_list_cache["checked_at"] is not None
+        and now - _access_list_cache["checked_at"]
+        < settings.BOTMYDESK_ACCESS_LIST_CHECK_INTERVAL
+    ):
+        return _access_list_cache["allowed"], _access_list_cache["denied"]
+
+    version = AccessListEntry.current_version()
+    _access_list_cache["checked_at"] = now
+
+    if version != _access_list_cache["version"]:
+        entries = AccessListEntry.objects.values_list("slack_user_id", "access")
+        _access_list_cache.update(
+            version=version,
+            allowed=frozenset(settings.BOTMYDESK_WHITELISTED_SLACK_IDS).union(
+                x for x, access in entries if access == AccessListEntry.ALLOW
+            ),
+            denied=frozenset(
+                x for x, access in entries if access == AccessListEntry.DENY
+            ),
+        )
+        botmydesk_logger.debug(f"Reloaded access lists (version {version})")
+
+    return _access_list_cache["allowed"], _access_list_cache["denied"]
+
+
 def apply_user_locale(botmydesk_user: BotMyDeskUser):
     botmydesk_logger.debug(f"Applying user locale: {botmydesk_user.preferred_locale}")
 
-    # Django gettext strings.
+    # Django gettext strings and date formats, e.g. _format_day(). Per thread, unlike Python's locale.setlocale().
     translation.activate(botmydesk_user.preferred_locale)
 
-    # Python (e.g. date formatters).
-    locale.setlocale(locale.LC_TIME, botmydesk_user.preferred_locale)
+
+def _format_day(value: datetime.date) -> str:
+    """E.g. "Monday 2 January", in the active language."""
+    return formats.date_format(value, "l j F")
 
 
 def gui_list_upcoming_reservations(botmydesk_user: BotMyDeskUser) -> Optional[list]:
@@ -104,39 +176,22 @@ def gui_list_upcoming_reservations(botmydesk_user: BotMyDeskUser) -> Optional[li
         timezone.now(), timezone=botmydesk_user.user_tz_instance()
     )
 
+    owner_id = bmd_core.reservations.owner_id(botmydesk_user)
+    reservations_text = ""
+
     try:
-        reservations_result = bmd_api_client.client.list_reservations_v3(
+        for current in bmd_core.reservations.reservations(
             botmydesk_user,
-            **{
-                "from": start.date(),
-                "to": (start + timezone.timedelta(days=7)).date(),
-                "take": 50,
-            },
-        )
-    except BookMyDeskException as error:
-        result = slack_web_client().chat_postEphemeral(
-            channel=botmydesk_user.slack_user_id,
-            user=botmydesk_user.slack_user_id,
-            text=gettext("Sorry, an error occurred while requesting your reservations")
-            + f": ```{error}```",
-        )
-        result.validate()
-        return
-
-    reservations_text = gettext("_No reservations found (or too far away)..._")
-    profile = bmd_api_client.client.me_v3(botmydesk_user=botmydesk_user)
-
-    if reservations_result.reservations():
-        reservations_text = ""
-
-        for current in reservations_result.reservations():
+            start=start.date(),
+            end=(start + timezone.timedelta(days=7)).date(),
+        ):
             reservation_start = current.date_start()
-            reservation_start_text = reservation_start.strftime("%A %-d %B")
+            reservation_start_text = _format_day(reservation_start)
 
             current_from = current.checked_in_time() or current.from_time()
             current_to = current.checked_out_time() or current.to_time()
 
-            if current.owner_id() != profile.id():
+            if current.owner_id() != owner_id:
                 # Ignore delegates
                 continue
 
@@ -172,6 +227,18 @@ def gui_list_upcoming_reservations(botmydesk_user: BotMyDeskUser) -> Optional[li
             text_from = gettext("from")
             text_to = gettext("to")
             reservations_text += f"\n\n\n{emoji} *{reservation_start_text}*\n_{location}, {text_from} {current_from} {text_to} {current_to}_"
+    except BookMyDeskException as error:
+        result = slack_web_client().chat_postEphemeral(
+            channel=botmydesk_user.slack_user_id,
+            user=botmydesk_user.slack_user_id,
+            text=gettext("Sorry, an error occurred while requesting your reservations")
+            + f": ```{error}```",
+        )
+        result.validate()
+        return
+
+    if not reservations_text:
+        reservations_text = gettext("_No reservations found (or too far away)..._")
 
     return [
         {
@@ -200,20 +267,19 @@ def gui_status_notification(botmydesk_user: BotMyDeskUser, *_) -> Optional[list]
     if not botmydesk_user.has_authorized_bot():
         return _unauthorized_reply_shortcut(botmydesk_user)
 
-    today_text = timezone.localtime(
-        timezone.now(), timezone=botmydesk_user.user_tz_instance()
-    ).strftime("%A %-d %B")
-    reservations_result = bmd_api_client.client.list_reservations_v3(botmydesk_user)
+    today_text = _format_day(
+        timezone.localtime(timezone.now(), timezone=botmydesk_user.user_tz_instance())
+    )
     reservation_count = 0  # Omits ignored ones below
     has_home_reservation = has_office_reservation = has_external_reservation = False
     checked_in = checked_out = False
     reservation_start = reservation_end = None
 
-    profile = bmd_api_client.client.me_v3(botmydesk_user=botmydesk_user)
+    owner_id = bmd_core.reservations.owner_id(botmydesk_user)
 
     # Very shallow assertions.
-    for current in reservations_result.reservations():
-        if current.owner_id() != profile.id():
+    for current in bmd_core.reservations.reservations(botmydesk_user):
+        if current.owner_id() != owner_id:
             # Ignore delegates
             continue
 
@@ -492,7 +558,7 @@ def handle_user_working_home_today(botmydesk_user: BotMyDeskUser, payload):
         )
         local_end = local_start.replace(hour=23, minute=59)
         try:
-            bmd_api_client.client.create_reservation_v3(
+            bmd_core.reservations.create(
                 botmydesk_user=botmydesk_user,
                 reservation_type="home",
                 start=local_start,
@@ -505,7 +571,7 @@ def handle_user_working_home_today(botmydesk_user: BotMyDeskUser, payload):
         else:
             report_text = gettext("✔️ _I booked you a home spot._")
 
-    update_user_app_home(botmydesk_user=botmydesk_user)
+    schedule_app_home_update(botmydesk_user)
 
     message_to_user = gettext(
         f"🏡 _You requested me to book you for working at home._\n\n\n{report_text}"
@@ -568,7 +634,7 @@ def handle_user_working_in_office_today(botmydesk_user: BotMyDeskUser, payload):
 
             if current.status() == "reserved":
                 try:
-                    bmd_api_client.client.reservation_check_in_out(
+                    bmd_core.reservations.check_in_out(
                         botmydesk_user, current_reservation_id, check_in=True
                     )
                 except BookMyDeskException as error:
@@ -585,7 +651,7 @@ def handle_user_working_in_office_today(botmydesk_user: BotMyDeskUser, payload):
             )
             break
 
-    update_user_app_home(botmydesk_user=botmydesk_user)
+    schedule_app_home_update(botmydesk_user)
 
     message_to_user = gettext(
         f"🏢 _You requested me to check you in for the office._\n\n\n{report_text}"
@@ -694,7 +760,7 @@ def handle_user_working_externally_today(botmydesk_user: BotMyDeskUser, payload)
 
             if current.status() == "reserved":
                 try:
-                    bmd_api_client.client.reservation_check_in_out(
+                    bmd_core.reservations.check_in_out(
                         botmydesk_user, current_reservation_id, check_in=True
                     )
                 except BookMyDeskException as error:
@@ -728,7 +794,7 @@ def handle_user_working_externally_today(botmydesk_user: BotMyDeskUser, payload)
         for current in external_map.seats():
             try:
                 # Just trial and error.
-                reservation_id = bmd_api_client.client.create_reservation_v3(
+                reservation_id = bmd_core.reservations.create(
                     botmydesk_user=botmydesk_user,
                     reservation_type="normal",
                     start=local_start,
@@ -745,7 +811,7 @@ def handle_user_working_externally_today(botmydesk_user: BotMyDeskUser, payload)
 
             try:
                 # Check in as well.
-                bmd_api_client.client.reservation_check_in_out(
+                bmd_core.reservations.check_in_out(
                     botmydesk_user, reservation_id, check_in=True
                 )
             except BookMyDeskException as error:
@@ -759,7 +825,7 @@ def handle_user_working_externally_today(botmydesk_user: BotMyDeskUser, payload)
     )
     _post_handle_report_update(botmydesk_user, message_to_user, payload)
 
-    update_user_app_home(botmydesk_user=botmydesk_user)
+    schedule_app_home_update(botmydesk_user)
 
 
 def handle_user_not_working_today(botmydesk_user: BotMyDeskUser, payload):
@@ -813,7 +879,7 @@ def handle_user_not_working_today(botmydesk_user: BotMyDeskUser, payload):
             # Just check out.
             elif current_status in ("checkedIn",):
                 try:
-                    bmd_api_client.client.reservation_check_in_out(
+                    bmd_core.reservations.check_in_out(
                         botmydesk_user, current_reservation_id, check_in=False
                     )
                 except BookMyDeskException as error:
@@ -827,9 +893,7 @@ def handle_user_not_working_today(botmydesk_user: BotMyDeskUser, payload):
             # Delete.
             elif current_status in ("reserved",):
                 try:
-                    bmd_api_client.client.delete_reservation_v3(
-                        botmydesk_user, current_reservation_id
-                    )
+                    bmd_core.reservations.delete(botmydesk_user, current_reservation_id)
                 except BookMyDeskException as error:
                     report_text += gettext(
                         f"{current_reservation_text}\n\t\t ⚠️ *Failed to delete your reservation*\n ```{error}```"
@@ -844,7 +908,7 @@ def handle_user_not_working_today(botmydesk_user: BotMyDeskUser, payload):
                     f"{current_reservation_text}\n\t\t ⚠️ _Unexpected status, **left untouched**!_"
                 )
 
-    update_user_app_home(botmydesk_user=botmydesk_user)
+    schedule_app_home_update(botmydesk_user)
 
     message_to_user = gettext(
         f"❌ _You requested me to clear your reservations._\n\n\n{report_text}"
@@ -852,99 +916,395 @@ def handle_user_not_working_today(botmydesk_user: BotMyDeskUser, payload):
     _post_handle_report_update(botmydesk_user, message_to_user, payload)
 
 
-def update_user_app_home(botmydesk_user: BotMyDeskUser):
+def handle_user_working_home_on_days(botmydesk_user: BotMyDeskUser, payload):
+    """Books home spots on multiple days, e.g. "home week". Done in the background, as it may take a while."""
+    _schedule_multiple_days(botmydesk_user, payload, "home")
+
+
+def handle_user_working_in_office_on_days(botmydesk_user: BotMyDeskUser, payload):
+    """Checks office reservations on multiple days, e.g. "office mon,wed". Done in the background as well."""
+    _schedule_multiple_days(botmydesk_user, payload, "normal")
+
+
+def handle_user_working_on_days(
+    botmydesk_user: BotMyDeskUser, reservation_type: str, dates: list
+):
+    """
+    Books home spots on the dates given, unless booked already. Or, for the office, checks whether a reservation
+    exists (checking in for today). Bookings are created concurrently. Reports back in a single message.
+    """
     apply_user_locale(botmydesk_user)
+    local_today = timezone.localtime(
+        timezone.now(), timezone=botmydesk_user.user_tz_instance()
+    ).date()
 
-    if botmydesk_user.has_authorized_bot():
-        blocks = [
+    try:
+        # Refreshes the session once, before going concurrent.
+        profile = bmd_api_client.client.me_v3(botmydesk_user=botmydesk_user)
+        reservations_per_date = {x: [] for x in dates}
+
+        for current in bmd_api_client.client.iterate_reservations_v3(
+            botmydesk_user,
+            prefetch=True,
+            **{"from": min(dates), "to": max(dates) + datetime.timedelta(days=1)},
+        ):
+            current_date = timezone.localtime(
+                current.date_start(), timezone=botmydesk_user.user_tz_instance()
+            ).date()
+
+            if (
+                current.owner_id() != profile.id()
+                or current.type() != reservation_type
+                or current.status() in bmd_core.reservations.ENDED_STATUSES
+                or current_date not in reservations_per_date
+            ):
+                continue
+
+            reservations_per_date[current_date].append(current)
+    except BookMyDeskException as error:
+        slack_web_client().chat_postEphemeral(
+            channel=botmydesk_user.slack_user_id,
+            user=botmydesk_user.slack_user_id,
+            text=gettext(
+                f"Sorry, an error occurred while requesting your reservations: ```{error}```"
+            ),
+        ).validate()
+        return
+
+    report_per_date = {}
+    dates_to_book = []
+
+    for current_date, reservations in reservations_per_date.items():
+        if reservation_type == "home":
+            if reservations:
+                report_per_date[current_date] = gettext(
+                    "✔️ _Left as-is, already booked_"
+                )
+            else:
+                dates_to_book.append(current_date)
+            continue
+
+        office_reservations = [x for x in reservations if x.seat() is not None]
+
+        if not office_reservations:
+            report_per_date[current_date] = gettext(
+                "⚠️ No office reservation found. Please book an office seat manually."
+            )
+        elif (
+            current_date == local_today
+            and office_reservations[0].status() == "reserved"
+        ):
+            try:
+                bmd_core.reservations.check_in_out(
+                    botmydesk_user, office_reservations[0].id(), check_in=True
+                )
+            except BookMyDeskException as error:
+                report_per_date[current_date] = gettext(
+                    f"⚠️ *Failed to check you in*\n ```{error}```"
+                )
+            else:
+                report_per_date[current_date] = gettext(
+                    f"✅ _I checked you in at {office_reservations[0].seat().map_name()}_"
+                )
+        else:
+            report_per_date[current_date] = gettext(
+                f"✔️ _Office reservation found at {office_reservations[0].seat().map_name()}_"
+            )
+
+    for current_date, _, error in bmd_core.concurrency.map_concurrently(
+        lambda x: _create_home_reservation(botmydesk_user, x, local_today),
+        dates_to_book,
+        max_workers=settings.BOTMYDESK_BOOKING_CONCURRENCY,
+    ):
+        if error is None:
+            report_per_date[current_date] = gettext("✅ _I booked you a home spot_")
+        else:
+            report_per_date[current_date] = gettext(
+                f"⚠️ *Failed to book you a home spot*\n ```{error}```"
+            )
+
+    if dates_to_book:
+        bmd_core.reservations.invalidate(botmydesk_user)
+
+    schedule_app_home_update(botmydesk_user)
+
+    if reservation_type == "home":
+        report_text = gettext(
+            "🏡 _You requested me to book you for working at home on these days._"
+        )
+    else:
+        report_text = gettext(
+            "🏢 _You requested me to check your office reservations on these days._"
+        )
+
+    for current_date in sorted(report_per_date):
+        report_text += f"\n\n\n• *{_format_day(current_date)}*\n\t\t{report_per_date[current_date]}"
+
+    title = gettext("Your reservations update")
+    slack_web_client().chat_postMessage(
+        channel=botmydesk_user.slack_user_id,
+        user=botmydesk_user.slack_user_id,
+        text=title,
+        blocks=[
             {
-                "type": "actions",
+                "type": "header",
+                "text": {
+                    "type": "plain_text",
+                    "text": title,
+                },
+            },
+            {
+                "type": "context",
                 "elements": [
                     {
-                        "type": "button",
-                        "text": {
-                            "type": "plain_text",
-                            "emoji": True,
-                            "text": "⚙️ " + gettext("Preferences"),
-                        },
-                        "value": "open_preferences",
+                        "type": "mrkdwn",
+                        "text": report_text,
                     },
+                ],
+            },
+        ],
+    ).validate()
+
+
+def gui_who_is_in_the_office(botmydesk_user: BotMyDeskUser, *_) -> Optional[list]:
+    """
+    :return: Slack blocks GUI elements
+    """
+    if not botmydesk_user.has_authorized_bot():
+        return _unauthorized_reply_shortcut(botmydesk_user)
+
+    title = gettext("Who's in the office today")
+    occupancy = bmd_core.occupancy.snapshot(botmydesk_user)
+
+    if occupancy is None:
+        # E.g. for new users or just after midnight. Don't flood the queue when users retry impatiently.
+        if cache.add(
+            f"company_occupancy_requested_{botmydesk_user.slack_user_id}", True, 60
+        ):
+            bmd_core.tasks.refresh_user_company_occupancy.delay(botmydesk_user.pk)
+
+        occupancy_text = gettext(
+            "_I'm still looking around the office. Please try again in a minute._"
+        )
+    else:
+        occupancy_text = ""
+
+        for current in occupancy["maps"]:
+            if not current["people"]:
+                continue
+
+            occupancy_text += f"\n\n\n🏢 *{current['name']}* ({len(current['people'])})\n_{', '.join(current['people'])}_"
+
+        if not occupancy_text:
+            occupancy_text = gettext("_No one seems to be in the office today..._")
+
+        refreshed_at = timezone.localtime(
+            occupancy["refreshed_at"], timezone=botmydesk_user.user_tz_instance()
+        ).strftime("%H:%M")
+        occupancy_text += "\n\n\n" + gettext("_Last updated at") + f" {refreshed_at}_"
+
+    return [
+        {
+            "type": "header",
+            "text": {
+                "type": "plain_text",
+                "text": title,
+            },
+        },
+        {
+            "type": "context",
+            "elements": [
+                {
+                    "type": "mrkdwn",
+                    "text": occupancy_text,
+                }
+            ],
+        },
+    ]
+
+
+def notify_reservations_ended(botmydesk_user: BotMyDeskUser, reservations: list):
+    """Tells the user about reservations of today expired or cancelled upstream, e.g. when not checked in on time."""
+    apply_user_locale(botmydesk_user)
+
+    title = gettext("Your BookMyDesk reservation ended")
+    reservations_text = gettext(
+        "⚠️ _BookMyDesk reports the following reservation(s) of today as no longer valid:_"
+    )
+
+    for current in reservations:
+        if current.status() == "expired":
+            status_text = gettext("Expired")
+        else:
+            status_text = gettext("Cancelled")
+
+        reservations_text += f"\n\n\n{current.emoji_shortcut()} *{current.from_time()} - {current.to_time()}* ({current.location_name_shortcut()})\n_{status_text}_"
+
+    slack_web_client().chat_postMessage(
+        channel=botmydesk_user.slack_user_id,
+        user=botmydesk_user.slack_user_id,
+        text=title,
+        blocks=[
+            {
+                "type": "header",
+                "text": {
+                    "type": "plain_text",
+                    "text": title,
+                },
+            },
+            {
+                "type": "context",
+                "elements": [
                     {
-                        "type": "button",
-                        "text": {
-                            "type": "plain_text",
-                            "emoji": True,
-                            "text": gettext("Help / Commands"),
-                        },
-                        "value": "trigger_help",
+                        "type": "mrkdwn",
+                        "text": reservations_text,
                     },
                 ],
-            }
-        ]
-        blocks.extend(gui_list_upcoming_reservations(botmydesk_user))
-    else:
-        blocks = [
+            },
             {
                 "type": "actions",
                 "elements": [
                     {
                         "type": "button",
-                        "style": "primary",
                         "text": {
                             "type": "plain_text",
-                            "emoji": True,
-                            "text": "🔗️ " + gettext("Link BookMyDesk"),
+                            "text": gettext("Check my status"),
                         },
-                        "value": "open_preferences",
+                        "value": "status_notification",
                     },
                 ],
             },
+        ],
+    ).validate()
+
+    schedule_app_home_update(botmydesk_user)
+
+
+def notify_checked_out_at_end_of_day(botmydesk_user: BotMyDeskUser, reservations: list):
+    """Tells the user they were checked out automatically, as they forgot to."""
+    apply_user_locale(botmydesk_user)
+
+    title = gettext("Checked out for today")
+    report_text = gettext(
+        "🏁 _It's the end of the day, so I checked you out of the following reservation(s):_"
+    )
+
+    for current in reservations:
+        report_text += f"\n\n\n{current.emoji_shortcut()} *{current.checked_in_time() or current.from_time()} - {current.to_time()}* ({current.location_name_shortcut()})"
+
+    slack_web_client().chat_postMessage(
+        channel=botmydesk_user.slack_user_id,
+        user=botmydesk_user.slack_user_id,
+        text=title,
+        blocks=[
             {
                 "type": "header",
                 "text": {
                     "type": "plain_text",
-                    "text": gettext(f"Hi {botmydesk_user.slack_name} 👋"),
-                },
-            },
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": gettext("My name is")
-                    + f" {settings.BOTMYDESK_NAME}, "
-                    + gettext(
-                        "I'm an unofficial Slack bot for BookMyDesk. I can remind you to check-in at the office or at home. Making life a bit easier for you!"
-                    ),
+                    "text": title,
                 },
             },
             {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": gettext(
-                        "Click the button above to link your BookMyDesk account."
-                    ),
-                },
+                "type": "context",
+                "elements": [
+                    {
+                        "type": "mrkdwn",
+                        "text": report_text,
+                    },
+                ],
             },
-        ]
+        ],
+    ).validate()
+
+    schedule_app_home_update(botmydesk_user)
+
+
+def schedule_app_home_update(botmydesk_user: BotMyDeskUser):
+    """Updates the app home of the user in the background, e.g. after their reservations or preferences changed."""
+    bmd_core.tasks.update_botmydesk_app_home.delay(botmydesk_user.pk)
+
+
+def claim_app_home_freshness(botmydesk_user: BotMyDeskUser) -> bool:
+    """Whether the app home of the user is due for an update, marking it fresh for a while if so."""
+    now = timezone.now()
+    fresh_since = now - timezone.timedelta(
+        seconds=settings.BOTMYDESK_APP_HOME_FRESHNESS_SECONDS
+    )
+
+    # Conditional update, so only one of any concurrent claims wins.
+    return bool(
+        BotMyDeskUser.objects.filter(pk=botmydesk_user.pk)
+        .filter(
+            Q(app_home_rendered_at__isnull=True)
+            | Q(app_home_rendered_at__lte=fresh_since)
+        )
+        .update(app_home_rendered_at=now)
+    )
+
+
+def update_user_app_home(botmydesk_user: BotMyDeskUser) -> bool:
+    """Renders the app home of the user. Returns whether it was published, as unchanged views are skipped."""
+    apply_user_locale(botmydesk_user)
+    BotMyDeskUser.objects.filter(pk=botmydesk_user.pk).update(
+        app_home_rendered_at=timezone.now()
+    )
+
+    if botmydesk_user.has_authorized_bot():
+        blocks = bmd_core.view_templates.authorized_app_home_blocks(
+            gui_list_upcoming_reservations(botmydesk_user)
+        )
+    else:
+        blocks = bmd_core.view_templates.unauthorized_app_home_blocks(botmydesk_user)
+
+    return publish_app_home_view(botmydesk_user, blocks)
+
+
+def publish_app_home_view(botmydesk_user: BotMyDeskUser, blocks: list) -> bool:
+    """Publishes the app home view, unless it is identical to the one we published last. Returns whether published."""
+    view = {
+        "type": "home",
+        "blocks": blocks,
+    }
+    view_hash = hashlib.sha256(
+        json.dumps(view, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+    # Expiry forces a republish once in a while, just in case the view got lost somehow on Slack's side.
+    published_since = timezone.now() - timezone.timedelta(
+        seconds=settings.BOTMYDESK_APP_HOME_HASH_TTL
+    )
+
+    if BotMyDeskUser.objects.filter(
+        pk=botmydesk_user.pk,
+        app_home_published_hash=view_hash,
+        app_home_published_at__gt=published_since,
+    ).exists():
+        botmydesk_logger.debug(
+            f"App home of @{botmydesk_user.slack_user_id} unchanged, skipped publishing"
+        )
+        bmd_core.metrics.increment("botmydesk_app_home_updates_total", result="skipped")
+        return False
 
     slack_web_client().views_publish(
         user_id=botmydesk_user.slack_user_id,
-        view={
-            "type": "home",
-            "blocks": blocks,
-        },
+        view=view,
     ).validate()
 
+    BotMyDeskUser.objects.filter(pk=botmydesk_user.pk).update(
+        app_home_published_hash=view_hash, app_home_published_at=timezone.now()
+    )
+    bmd_core.metrics.increment("botmydesk_app_home_updates_total", result="published")
+    return True
+
 
 def _post_handle_report_update(
     botmydesk_user: BotMyDeskUser,
     message_to_user: str,
     payload: dict,
 ):
-    today_text = timezone.localtime(
-        timezone.now(), timezone=botmydesk_user.user_tz_instance()
-    ).strftime("%A %-d %B")
+    today_text = _format_day(
+        timezone.localtime(timezone.now(), timezone=botmydesk_user.user_tz_instance())
+    )
     title = gettext(f"{today_text} update")
 
     slack_web_client().chat_postMessage(
@@ -981,9 +1341,144 @@ def _post_handle_report_update(
         pass
 
 
+def _schedule_multiple_days(
+    botmydesk_user: BotMyDeskUser, payload: dict, reservation_type: str
+):
+    if not botmydesk_user.has_authorized_bot():
+        return _unauthorized_reply_shortcut(botmydesk_user)
+
+    local_today = timezone.localtime(
+        timezone.now(), timezone=botmydesk_user.user_tz_instance()
+    ).date()
+    arguments = payload["text"].strip().partition(" ")[2]
+
+    try:
+        dates = _parse_days(arguments, local_today)
+    except ValueError:
+        slack_web_client().chat_postEphemeral(
+            channel=botmydesk_user.slack_user_id,
+            user=botmydesk_user.slack_user_id,
+            text=gettext(
+                f"Sorry, I don't understand which days you mean by `{arguments}`. Try e.g. `week` or `mon,wed`."
+            ),
+        ).validate()
+        return
+
+    # Slack only waits a few seconds for us.
+    bmd_core.tasks.book_multiple_days.delay(
+        botmydesk_user.pk, reservation_type, [x.isoformat() for x in dates]
+    )
+
+    slack_web_client().chat_postEphemeral(
+        channel=botmydesk_user.slack_user_id,
+        user=botmydesk_user.slack_user_id,
+        text=ngettext(
+            "⏳ On it! I'll message you when I'm done with that day.",
+            "⏳ On it! I'll message you when I'm done with those %(count)d days.",
+            len(dates),
+        )
+        % {"count": len(dates)},
+    ).validate()
+
+
+def _parse_days(arguments: str, local_today: datetime.date) -> list:
+    """
+    The upcoming working days meant, including today. Either "week" (the rest of the working week, or the next one
+    in the weekend) or weekdays separated by commas, in English or Dutch (e.g. "mon,wed" or "ma,wo").
+    """
+    arguments = arguments.strip().lower()
+
+    if arguments == "week":
+        if local_today.weekday() < 5:
+            monday = local_today - datetime.timedelta(days=local_today.weekday())
+        else:
+            monday = local_today + datetime.timedelta(days=7 - local_today.weekday())
+
+        return [
+            monday + datetime.timedelta(days=x)
+            for x in range(5)
+            if monday + datetime.timedelta(days=x) >= local_today
+        ]
+
+    weekday_names = (
+        ("monday", "maandag"),
+        ("tuesday", "dinsdag"),
+        ("wednesday", "woensdag"),
+        ("thursday", "donderdag"),
+        ("friday", "vrijdag"),
+    )
+    dates = set()
+
+    for current in arguments.replace(" ", "").split(","):
+        matches = [
+            weekday
+            for weekday, names in enumerate(weekday_names)
+            if len(current) >= 2 and any(x.startswith(current) for x in names)
+        ]
+
+        if len(matches) != 1:
+            raise ValueError(f"Unknown day: {current}")
+
+        dates.add(
+            local_today
+            + datetime.timedelta(days=(matches[0] - local_today.weekday()) % 7)
+        )
+
+    return sorted(dates)
+
+
+def _create_home_reservation(
+    botmydesk_user: BotMyDeskUser, date: datetime.date, local_today: datetime.date
+):
+    """Today's starts now, as the past cannot be booked."""
+    local_end = timezone.datetime.combine(
+        date,
+        datetime.time(hour=23, minute=59),
+        tzinfo=botmydesk_user.user_tz_instance(),
+    )
+
+    if date == local_today:
+        local_start = timezone.localtime(
+            timezone.now(), timezone=botmydesk_user.user_tz_instance()
+        )
+    else:
+        local_start = local_end.replace(hour=0, minute=0)
+
+    # The mirror is invalidated once, afterwards.
+    return bmd_api_client.client.create_reservation_v3(
+        botmydesk_user=botmydesk_user,
+        reservation_type="home",
+        start=local_start,
+        end=local_end,
+    )
+
+
 def _unauthorized_reply_shortcut(botmydesk_user: BotMyDeskUser):
     slack_web_client().chat_postEphemeral(
         channel=botmydesk_user.slack_user_id,
         user=botmydesk_user.slack_user_id,
         text=gettext("✋ Sorry, you will need to connect me first."),
     ).validate()
+
+
+class _InstrumentedWebClient(WebClient):
+    """Records metrics and traces of any Slack API call."""
+
+    def api_call(self, api_method: str, **kwargs) -> SlackResponse:
+        status = "error"
+
+        try:
+            with bmd_core.tracing.span(f"slack {api_method}"), bmd_core.metrics.timed(
+                "botmydesk_slack_request_duration_seconds", method=api_method
+            ):
+                result = super().api_call(api_method, **kwargs)
+
+            status = "ok"
+            return result
+        except SlackApiError as error:
+            status = error.response.get("error", "error")
+            raise
+        finally:
+            bmd_core.metrics.increment(
+                "botmydesk_slack_requests_total", method=api_method, status=status
+            )
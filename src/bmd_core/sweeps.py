@@ -0,0 +1,34 @@
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.db.models import Model, QuerySet
+
+
+def sweep(
+    queryset: QuerySet,
+    fields: Iterable[str] = (),
+    page_size: int = 0,
+    start_after_pk: int = 0,
+) -> Iterator[Model]:
+    """
+    Lazily yields all objects in the queryset, ordered by primary key, page by page. Pages are fetched using the last
+    primary key seen (keyset pagination), so memory usage stays flat no matter the number of objects. Only the fields
+    given are loaded, when given. Resumes after a checkpoint, when given.
+    """
+    page_size = page_size or settings.BOTMYDESK_SWEEP_PAGE_SIZE
+    queryset = queryset.order_by("pk")
+
+    if fields:
+        queryset = queryset.only(*fields)
+
+    last_pk = start_after_pk
+
+    while True:
+        page = list(queryset.filter(pk__gt=last_pk)[:page_size])
+
+        yield from page
+
+        if len(page) < page_size:
+            return
+
+        last_pk = page[-1].pk
@@ -1,43 +1,372 @@
 import logging
+import time
+import zoneinfo
 
-from celery import Celery
+from django.conf import settings
+from django.db.models import Q, QuerySet
 from django.utils import timezone
 from django.utils.translation import gettext
+from celery.signals import before_task_publish, task_prerun, task_postrun
 from slack_sdk.errors import SlackApiError
 
-from bmd_core.models import BotMyDeskUser
+from botmydesk.celery import app
+from bmd_api_client.exceptions import BookMyDeskException
+from bmd_core.models import BotMyDeskUser, DailyRun
+from bmd_core.concurrency import map_concurrently, rate_limited
+from bmd_core.leases import Lease, leased
+from bmd_core.sweeps import sweep
 import bmd_api_client.client
+import bmd_core.metrics
+import bmd_core.occupancy
+import bmd_core.reservations
 import bmd_core.services
+import bmd_core.tracing
 
 
 botmydesk_logger = logging.getLogger("botmydesk")
-app = Celery()
+_task_start_times = {}
+_task_spans = {}
 
 
 @app.task
-def refresh_all_bookmydesk_sessions():
+@leased
+@rate_limited()
+def refresh_all_bookmydesk_sessions(lease: Lease):
     """Triggers a profile call for very user, causing a token/user update in the API client and persists it."""
-    for current in BotMyDeskUser.objects.with_session():
+    for current in sweep(
+        BotMyDeskUser.objects.with_session(),
+        fields=BotMyDeskUser.SESSION_FIELDS,
+        start_after_pk=lease.resume_after_pk(),
+    ):
         botmydesk_logger.info(
             f"Performing scheduled session refresh for @{current.slack_user_id} ({current.slack_email})"
         )
         bmd_api_client.client.me_v3(
             botmydesk_user=current
         )  # Refresh + persists logic in client.
+        lease.checkpoint(current.pk)
+
+
+@app.task
+@leased
+def sync_slack_profiles(lease: Lease) -> dict:
+    """
+    Bulk syncs Slack profile info of all users known, by walking all Slack users page by page.
+    Profile changes are processed by events as well, so this is merely a safety net for any events we missed.
+    Users with a changed timezone have their app home updated, as it displays dates in their local time.
+    """
+    web_client = bmd_core.services.slack_web_client()
+    cursor = None
+    updated_count = unchanged_count = 0
+    fields = ("slack_email", "slack_name", "slack_tz")
+
+    while True:
+        users_list_result = web_client.users_list(
+            cursor=cursor, limit=settings.BOTMYDESK_SLACK_USERS_LIST_PAGE_SIZE
+        )
+        users_list_result.validate()
+
+        members = {x["id"]: x for x in users_list_result["members"]}
+        botmydesk_users = BotMyDeskUser.objects.filter(
+            slack_user_id__in=members.keys()
+        ).only("slack_user_id", *fields)
+        timezone_changed_users = []
+
+        for current in botmydesk_users:
+            profile_data = bmd_core.services.slack_profile_data(
+                members[current.slack_user_id], current
+            )
+
+            for key, value in profile_data.items():
+                setattr(current, key, value)
+
+            if current.dirty_fields("slack_tz"):
+                timezone_changed_users.append(current)
+
+        changed_users = BotMyDeskUser.objects.bulk_update_dirty(
+            botmydesk_users, fields=fields
+        )
+        updated_count += len(changed_users)
+        unchanged_count += len(botmydesk_users) - len(changed_users)
+
+        for current in timezone_changed_users:
+            botmydesk_logger.info(
+                f"Timezone of @{current.slack_user_id} changed to {current.slack_tz}"
+            )
+            bmd_core.services.schedule_app_home_update(current)
+
+        lease.heartbeat()
+        cursor = users_list_result.get("response_metadata", {}).get("next_cursor")
+
+        if not cursor:
+            break
+
+    botmydesk_logger.info(
+        f"Synced Slack profiles: {updated_count} updated, {unchanged_count} unchanged"
+    )
+
+    return {
+        "updated": updated_count,
+        "unchanged": unchanged_count,
+    }
+
+
+@app.task
+def update_botmydesk_app_home(botmydesk_user_id: int):
+    """Updates the app home screen of a single user, e.g. after anything changed for them."""
+    try:
+        botmydesk_user = BotMyDeskUser.objects.get(pk=botmydesk_user_id)
+    except BotMyDeskUser.DoesNotExist:
+        return
+
+    bmd_core.services.update_user_app_home(botmydesk_user=botmydesk_user)
+
+
+@app.task
+def book_multiple_days(botmydesk_user_id: int, reservation_type: str, dates: list):
+    """Books or checks reservations on multiple days for a single user, as requested by them."""
+    try:
+        botmydesk_user = BotMyDeskUser.objects.get(pk=botmydesk_user_id)
+    except BotMyDeskUser.DoesNotExist:
+        return
+
+    bmd_core.services.handle_user_working_on_days(
+        botmydesk_user,
+        reservation_type,
+        [timezone.datetime.fromisoformat(x).date() for x in dates],
+    )
+
+
+@app.task
+@leased
+@rate_limited()
+def sync_botmydesk_app_homes(lease: Lease) -> dict:
+    """
+    Updates the app home screen for every user linked. Unchanged app homes are not published again.
+    App homes are updated on any change as well, so this is merely a safety net for anything we missed.
+    """
+    return _update_app_homes(
+        BotMyDeskUser.objects.with_session(),
+        lease,
+        start_after_pk=lease.resume_after_pk(),
+    )
 
 
 @app.task
-def sync_botmydesk_app_homes():
-    """Updates the app home screen for every user linked."""
-    for current in BotMyDeskUser.objects.with_session():
+@leased
+@rate_limited()
+def sync_botmydesk_app_homes_on_date_rollover(lease: Lease) -> dict:
+    """Updates the app home screen of all users in timezones that just passed midnight, as their 'today' changed."""
+    result = {
+        "published": 0,
+        "skipped": 0,
+    }
+
+    for current_timezone in BotMyDeskUser.objects.timezones():
+        local_date = timezone.localtime(
+            timezone.now(), zoneinfo.ZoneInfo(current_timezone)
+        ).date()
+
+        run_name = f"app_home_date_rollover_{current_timezone}"
+
+        if DailyRun.objects.filter(name=run_name, date=local_date).exists():
+            continue
+
         botmydesk_logger.info(
-            f"Performing periodic app home update for @{current.slack_user_id} ({current.slack_email})"
+            f"Date rolled over to {local_date} in timezone {current_timezone}, updating app homes"
+        )
+        timezone_result = _update_app_homes(
+            BotMyDeskUser.objects.with_session().filter(slack_tz=current_timezone),
+            lease,
+            checkpoint=False,
+        )
+        result["published"] += timezone_result["published"]
+        result["skipped"] += timezone_result["skipped"]
+
+        # Only recorded once done, so an interrupted run is retried.
+        DailyRun.objects.start(run_name, local_date)
+
+    return result
+
+
+@app.task
+@leased
+@rate_limited()
+def sync_reservations(lease: Lease) -> dict:
+    """
+    Syncs the local reservations mirror of users not synced recently, so reads rarely have to wait for it.
+    Only the window of days mirrored is synced, and only during working hours of users. Past reservations are purged
+    as well.
+    """
+    synced_count = failed_count = 0
+    outdated = timezone.now() - timezone.timedelta(
+        seconds=settings.BOTMYDESK_RESERVATIONS_SYNC_INTERVAL
+    )
+    start_hour, end_hour = settings.BOTMYDESK_RESERVATIONS_SYNC_HOURS
+    working_timezones = []
+
+    for current_timezone in BotMyDeskUser.objects.timezones():
+        local_now = timezone.localtime(
+            timezone.now(), zoneinfo.ZoneInfo(current_timezone)
+        )
+
+        if local_now.weekday() < 5 and start_hour <= local_now.hour < end_hour:
+            working_timezones.append(current_timezone)
+
+    for current in sweep(
+        BotMyDeskUser.objects.with_session().filter(
+            Q(reservations_synced_at__isnull=True)
+            | Q(reservations_synced_at__lte=outdated),
+            slack_tz__in=working_timezones,
+        ),
+        fields=BotMyDeskUser.SESSION_FIELDS,
+        start_after_pk=lease.resume_after_pk(),
+    ):
+        try:
+            bmd_core.reservations.sync(current)
+        except BookMyDeskException as error:
+            # Reads will sync on the fly instead.
+            botmydesk_logger.warning(
+                f"Failed to sync reservations of @{current.slack_user_id}: {error}"
+            )
+            failed_count += 1
+        else:
+            synced_count += 1
+
+        lease.checkpoint(current.pk)
+
+    purged_count = bmd_core.reservations.purge_past_reservations()
+    botmydesk_logger.info(
+        f"Synced reservations: {synced_count} user(s) synced, {failed_count} failed, {purged_count} purged"
+    )
+
+    return {
+        "synced": synced_count,
+        "failed": failed_count,
+        "purged": purged_count,
+    }
+
+
+@app.task
+@leased
+@rate_limited()
+def refresh_company_occupancy(lease: Lease) -> dict:
+    """
+    Refreshes the occupancy snapshot of every company known, using the session of anyone in it. Companies with users in
+    multiple timezones may have a snapshot per local date. Snapshots of past dates are purged as well.
+    """
+    refreshed_count = failed_count = 0
+    company_dates = set()
+
+    for current_company_id, current_timezone in (
+        BotMyDeskUser.objects.with_session()
+        .filter(bookmydesk_company_id__isnull=False)
+        .values_list("bookmydesk_company_id", "slack_tz")
+        .distinct()
+    ):
+        local_date = timezone.localtime(
+            timezone.now(), zoneinfo.ZoneInfo(current_timezone)
+        ).date()
+        company_dates.add((current_company_id, local_date))
+
+    for current_company_id, current_date in sorted(company_dates):
+        # Any session will do. Try the next user on failure, e.g. for expired sessions.
+        for current in sweep(
+            BotMyDeskUser.objects.with_session().filter(
+                bookmydesk_company_id=current_company_id
+            ),
+            fields=BotMyDeskUser.SESSION_FIELDS,
+        ):
+            lease.heartbeat()
+
+            try:
+                bmd_core.occupancy.refresh(current, current_date)
+            except BookMyDeskException as error:
+                botmydesk_logger.warning(
+                    f"Failed to refresh occupancy of company {current_company_id} on {current_date} as @{current.slack_user_id}: {error}"
+                )
+                continue
+
+            refreshed_count += 1
+            break
+        else:
+            failed_count += 1
+
+    purged_count = bmd_core.occupancy.purge_past_snapshots()
+    botmydesk_logger.info(
+        f"Refreshed company occupancy: {refreshed_count} snapshot(s) refreshed, {failed_count} failed, {purged_count} purged"
+    )
+
+    return {
+        "refreshed": refreshed_count,
+        "failed": failed_count,
+        "purged": purged_count,
+    }
+
+
+@app.task
+def refresh_user_company_occupancy(botmydesk_user_id: int):
+    """Refreshes the occupancy snapshot of the company of a single user, e.g. when they requested it and it's missing."""
+    try:
+        botmydesk_user = BotMyDeskUser.objects.get(pk=botmydesk_user_id)
+    except BotMyDeskUser.DoesNotExist:
+        return
+
+    bmd_core.occupancy.refresh(botmydesk_user)
+
+
+@app.task
+@leased
+@rate_limited()
+def detect_reservation_changes(lease: Lease) -> dict:
+    """
+    Polls today's reservations of users having any (still) active ones, telling them when any expired or got
+    cancelled upstream. Users are polled concurrently, bounded by BOTMYDESK_CHANGE_DETECTION_CONCURRENCY.
+    """
+    result = {
+        "polled": 0,
+        "notified": 0,
+        "failed": 0,
+    }
+    now = timezone.now()
+    botmydesk_users = (
+        BotMyDeskUser.objects.with_session()
+        .filter(
+            # Roughly today in any timezone, as the exact local date is applied when polling.
+            reservations__date_start__lt=now + timezone.timedelta(days=1),
+            reservations__date_end__gt=now - timezone.timedelta(days=1),
+            # Not the mirrored status, as syncs may have updated it to ended already.
+            reservations__detected_status__in=("reserved", "checkedIn"),
         )
-        bmd_core.services.update_user_app_home(botmydesk_user=current)
+        .distinct()
+    )
+
+    for current, notified, error in map_concurrently(
+        _detect_reservation_changes_of_user,
+        sweep(botmydesk_users, fields=BotMyDeskUser.SESSION_FIELDS),
+        max_workers=settings.BOTMYDESK_CHANGE_DETECTION_CONCURRENCY,
+    ):
+        result["polled"] += 1
+        lease.heartbeat()
+
+        if error is not None:
+            botmydesk_logger.warning(
+                f"Failed to detect reservation changes of @{current.slack_user_id}: {error}"
+            )
+            result["failed"] += 1
+        elif notified:
+            result["notified"] += 1
+
+    botmydesk_logger.info(
+        f"Detected reservation changes: {result['polled']} user(s) polled, {result['notified']} notified, {result['failed']} failed"
+    )
+    return result
 
 
 @app.task
-def dispatch_botmydesk_notifications():
+@leased
+@rate_limited()
+def dispatch_botmydesk_notifications(lease: Lease):
     """
     Checks whether any daily notifications should be dispatched, taking user preferences into account.
     Either run this method every minute or once after every notification time available.
@@ -45,12 +374,7 @@ def dispatch_botmydesk_notifications():
     botmydesk_logger.info("Dispatching notifications to users (when applicable)")
 
     # Since we're dealing with local timezones, ensure to group 'em by timezone.
-    for current_timezone in (
-        BotMyDeskUser.objects.with_session()
-        .values("slack_tz")
-        .distinct()
-        .values_list("slack_tz", flat=True)
-    ):
+    for current_timezone in BotMyDeskUser.objects.timezones():
         botmydesk_logger.info(f"Processing users in timezone: {current_timezone}")
 
         # The loop below is a nice candidate for further async processing on a per-user basis if ever needed.
@@ -61,7 +385,9 @@ def dispatch_botmydesk_notifications():
             f"Found {eligible_users.count()} user(s) eligible in timezone: {current_timezone}"
         )
 
-        for current_botmydesk_user in eligible_users:
+        for current_botmydesk_user in sweep(
+            eligible_users, fields=BotMyDeskUser.SESSION_FIELDS
+        ):
             botmydesk_logger.info(
                 f"{current_timezone}: User @{current_botmydesk_user.slack_user_id} ({current_botmydesk_user.slack_email}) eligible for notification"
             )
@@ -83,11 +409,82 @@ def dispatch_botmydesk_notifications():
 
             # Only update here, since this is (for now) the only origin for automated notifications
             current_botmydesk_user.touch_last_notification_sent()
-            current_botmydesk_user.save()
+            current_botmydesk_user.save(update_fields=["last_notification_sent"])
+            lease.heartbeat()
 
 
 @app.task
-def purge_old_messages():
+@leased
+@rate_limited()
+def check_out_at_end_of_day(lease: Lease) -> dict:
+    """
+    Checks out users still checked in at the end of their day, once a day per timezone from
+    BOTMYDESK_END_OF_DAY_CHECKOUT_HOUR (local time). Users are processed concurrently, within the BookMyDesk rate limit.
+    Users are re-checked for a while, as the reservations mirror may not have caught up with recent check-ins yet.
+    """
+    result = {
+        "processed": 0,
+        "checked_out": 0,
+        "failed": 0,
+    }
+    recheck_period = timezone.timedelta(
+        seconds=settings.BOTMYDESK_END_OF_DAY_CHECKOUT_RECHECK
+    )
+
+    for current_timezone in BotMyDeskUser.objects.timezones():
+        local_now = timezone.localtime(
+            timezone.now(), zoneinfo.ZoneInfo(current_timezone)
+        )
+
+        if local_now.hour < settings.BOTMYDESK_END_OF_DAY_CHECKOUT_HOUR:
+            continue
+
+        daily_run = DailyRun.objects.start(
+            f"end_of_day_checkout_{current_timezone}", local_now.date()
+        )
+
+        if timezone.now() > daily_run.started_at + recheck_period:
+            continue
+
+        # The local mirror narrows it down to those checked in today, as far as we know.
+        local_midnight = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+        botmydesk_users = (
+            BotMyDeskUser.objects.with_session()
+            .filter(
+                slack_tz=current_timezone,
+                reservations__status="checkedIn",
+                reservations__date_start__gte=local_midnight,
+                reservations__date_start__lt=local_midnight
+                + timezone.timedelta(days=1),
+            )
+            .distinct()
+        )
+
+        for current, checked_out_reservations, error in map_concurrently(
+            _check_out_user_at_end_of_day,
+            sweep(botmydesk_users, fields=BotMyDeskUser.SESSION_FIELDS),
+            max_workers=settings.BOTMYDESK_CHECKOUT_CONCURRENCY,
+        ):
+            result["processed"] += 1
+            lease.heartbeat()
+
+            if error is not None:
+                botmydesk_logger.warning(
+                    f"{current_timezone}: Failed to check out @{current.slack_user_id}: {error}"
+                )
+                result["failed"] += 1
+            elif checked_out_reservations:
+                result["checked_out"] += 1
+
+    botmydesk_logger.info(
+        f"End of day checkout: {result['processed']} user(s) processed, {result['checked_out']} checked out, {result['failed']} failed"
+    )
+    return result
+
+
+@app.task
+@leased
+def purge_old_messages(lease: Lease):
     """Eventually delete messages."""
     max_age_in_hours = 12
     web_client = bmd_core.services.slack_web_client()
@@ -96,6 +493,7 @@ def purge_old_messages():
     conversations_list_result.validate()
 
     for current_channel in conversations_list_result["channels"]:
+        lease.heartbeat()
         conversations_history_result = web_client.conversations_history(
             channel=current_channel["id"]
         )
@@ -123,3 +521,106 @@ def purge_old_messages():
                 botmydesk_logger.error(
                     f"Error deleting message: {current_message}\n\n{error}"
                 )
+
+
+@before_task_publish.connect
+def _on_before_task_publish(headers: dict, **kwargs):
+    """Continues the current trace (if any) in the task."""
+    headers.update(bmd_core.tracing.propagation_headers())
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id: str, task, **kwargs):
+    _task_start_times[task_id] = time.monotonic()
+    _task_spans[task_id] = bmd_core.tracing.start_span(
+        f"celery {task.name}",
+        trace_id=getattr(task.request, bmd_core.tracing.TRACE_ID_HEADER, None),
+        parent_id=getattr(task.request, bmd_core.tracing.PARENT_SPAN_ID_HEADER, None),
+        task_id=task_id,
+    )
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id: str, task, state: str, retval=None, **kwargs):
+    """Records task metrics and flushes them periodically, as workers are long-running. Ends the trace as well."""
+    bmd_core.tracing.end_span(
+        _task_spans.pop(task_id, None),
+        retval if isinstance(retval, BaseException) else None,
+    )
+    start = _task_start_times.pop(task_id, None)
+
+    if start is not None:
+        bmd_core.metrics.observe(
+            "botmydesk_task_duration_seconds", time.monotonic() - start, task=task.name
+        )
+
+    bmd_core.metrics.increment("botmydesk_tasks_total", task=task.name, state=state)
+    bmd_core.metrics.flush_if_due()
+
+
+def _update_app_homes(
+    botmydesk_users: QuerySet,
+    lease: Lease,
+    checkpoint: bool = True,
+    start_after_pk: int = 0,
+) -> dict:
+    """Checkpoints progress, unless the caller sweeps multiple querysets (as the checkpoint only applies to one)."""
+    published_count = skipped_count = 0
+
+    for current in sweep(
+        botmydesk_users,
+        fields=BotMyDeskUser.SESSION_FIELDS,
+        start_after_pk=start_after_pk,
+    ):
+        botmydesk_logger.info(
+            f"Performing batched app home update for @{current.slack_user_id} ({current.slack_email})"
+        )
+
+        if bmd_core.services.update_user_app_home(botmydesk_user=current):
+            published_count += 1
+        else:
+            skipped_count += 1
+
+        if checkpoint:
+            lease.checkpoint(current.pk)
+        else:
+            lease.heartbeat()
+
+    total_count = published_count + skipped_count
+    skipped_ratio = skipped_count / total_count if total_count else 0
+    botmydesk_logger.info(
+        f"Batched app home update done: {published_count} published, {skipped_count} skipped as unchanged ({skipped_ratio:.0%} skipped)"
+    )
+
+    return {
+        "published": published_count,
+        "skipped": skipped_count,
+    }
+
+
+def _detect_reservation_changes_of_user(botmydesk_user: BotMyDeskUser) -> bool:
+    """Returns whether the user was notified."""
+    ended_reservations = bmd_core.reservations.detect_changes(botmydesk_user)
+
+    if not ended_reservations:
+        return False
+
+    botmydesk_logger.info(
+        f"{len(ended_reservations)} reservation(s) of @{botmydesk_user.slack_user_id} ended upstream"
+    )
+    bmd_core.services.notify_reservations_ended(botmydesk_user, ended_reservations)
+    return True
+
+
+def _check_out_user_at_end_of_day(botmydesk_user: BotMyDeskUser) -> list:
+    checked_out_reservations = bmd_core.reservations.check_out_today(botmydesk_user)
+
+    if checked_out_reservations:
+        botmydesk_logger.info(
+            f"Checked out @{botmydesk_user.slack_user_id} at the end of the day"
+        )
+        bmd_core.services.notify_checked_out_at_end_of_day(
+            botmydesk_user, checked_out_reservations
+        )
+
+    return checked_out_reservations
@@ -0,0 +1,200 @@
+"""
+Minimal request tracing, without any external dependencies. Spans are tracked per context (thread or task) and
+propagated to Celery tasks using task headers. Any trace is exported once its local root span ends, so a webhook and
+the tasks it triggers end up as separate exports sharing the same trace ID.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from django.conf import settings
+
+
+botmydesk_logger = logging.getLogger("botmydesk")
+
+TRACE_ID_HEADER = "botmydesk_trace_id"
+PARENT_SPAN_ID_HEADER = "botmydesk_parent_span_id"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "botmydesk_current_span", default=None
+)
+_file_lock = threading.Lock()
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        parent: Optional["Span"],
+        attributes: dict,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.parent = parent  # Local parent, if any
+        self.attributes = attributes
+        self.error = None
+        self.started_at = time.time()
+        self.duration = None
+        self._start = time.perf_counter()
+        # All spans of this trace ended in this process, shared with any child spans.
+        self.finished_spans: List[Span] = (
+            parent.finished_spans if parent is not None else []
+        )
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def enabled() -> bool:
+    return bool(settings.BOTMYDESK_TRACING_EXPORTER)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def start_span(
+    name: str,
+    trace_id: Optional[str] = None,
+    parent_id: Optional[str] = None,
+    **attributes,
+) -> Optional[Span]:
+    """
+    Starts a span as child of the current one. Unless a trace and parent span ID is given, e.g. from task headers.
+    Either way, the span becomes the current one. Returns nothing when tracing is disabled.
+    """
+    if not enabled():
+        return None
+
+    parent = _current_span.get()
+
+    if trace_id is None and parent is not None:
+        trace_id = parent.trace_id
+        parent_id = parent.span_id
+    elif trace_id is not None:
+        parent = None  # Remote parent
+
+    span = Span(
+        name=name,
+        trace_id=trace_id or uuid.uuid4().hex,
+        parent_id=parent_id,
+        parent=parent,
+        attributes=attributes,
+    )
+    _current_span.set(span)
+    return span
+
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None):
+    """Ends the span, restoring its parent as current span. Exports the trace when it was a local root span."""
+    if span is None:
+        return
+
+    span.duration = time.perf_counter() - span._start
+
+    if error is not None:
+        span.error = f"{error.__class__.__name__}: {error}"
+
+    span.finished_spans.append(span)
+    _current_span.set(span.parent)
+
+    if span.parent is None:
+        _export(span, span.finished_spans)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """Traces the block as a span, e.g. "with span('bookmydesk GET /v3/me'):"."""
+    current = start_span(name, **attributes)
+    error = None
+
+    try:
+        yield current
+    except Exception as exception:
+        error = exception
+        raise
+    finally:
+        end_span(current, error)
+
+
+def propagation_headers() -> dict:
+    """Headers to continue the current trace elsewhere, e.g. in Celery tasks."""
+    span = _current_span.get()
+
+    if span is None:
+        return {}
+
+    return {
+        TRACE_ID_HEADER: span.trace_id,
+        PARENT_SPAN_ID_HEADER: span.span_id,
+    }
+
+
+def _export(root_span: Span, spans: List[Span]):
+    try:
+        exporter = {
+            "stdout": _export_to_stdout,
+            "file": _export_to_file,
+        }[settings.BOTMYDESK_TRACING_EXPORTER]
+        exporter(root_span, spans)
+    except Exception as error:
+        # Tracing should never break anything.
+        botmydesk_logger.warning(
+            f"Failed to export trace {root_span.trace_id}: {error}"
+        )
+
+
+def _export_to_stdout(root_span: Span, spans: List[Span]):
+    """Human-readable breakdown of the spans, indented by depth."""
+    depths = {root_span.span_id: 0}
+    lines = [
+        f"Trace {root_span.trace_id}: {root_span.name} ({root_span.duration * 1000:.1f} ms)"
+    ]
+
+    for current in sorted(spans, key=lambda x: x._start):
+        depth = depths[current.span_id] = (
+            depths.get(current.parent_id, -1) + 1 if current is not root_span else 0
+        )
+        attributes = " ".join(f"{k}={v}" for k, v in current.attributes.items())
+        error = f" ERROR: {current.error}" if current.error else ""
+        lines.append(
+            f"{current.duration * 1000:>10.1f} ms  {'  ' * depth}{current.name}  {attributes}{error}".rstrip()
+        )
+
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+
+def _export_to_file(root_span: Span, spans: List[Span]):
+    """One JSON line per span."""
+    content = "".join(json.dumps(x.as_dict(), default=str) + "\n" for x in spans)
+
+    with _file_lock, open(settings.BOTMYDESK_TRACING_FILE, "a") as trace_file:
+        trace_file.write(content)
@@ -0,0 +1,501 @@
+"""
+Slack Block Kit views. The static parts of each view are built only once per locale and cached, as they are quite
+large. Only per-user fields are filled in on each render.
+
+Note that cached parts are shared between renders, so NEVER mutate anything returned by the functions below.
+"""
+import datetime
+import functools
+from typing import Callable
+
+from django.conf import settings
+from django.utils import translation
+from django.utils.translation import gettext
+
+from bmd_core.models import BotMyDeskUser
+
+
+_cached_builders = []
+
+
+def clear_cache():
+    """Drops all views cached, e.g. when settings changed."""
+    for current in _cached_builders:
+        current.cache_clear()
+
+
+def _cached_per_locale(builder: Callable) -> Callable:
+    """Caches the result of the builder per active locale (and any arguments given)."""
+
+    @functools.lru_cache(maxsize=None)
+    def cached_builder(language: str, *args):
+        return builder(*args)
+
+    _cached_builders.append(cached_builder)
+
+    @functools.wraps(builder)
+    def wrapper(*args):
+        return cached_builder(translation.get_language(), *args)
+
+    return wrapper
+
+
+def _plain_text(text: str) -> dict:
+    return {
+        "type": "plain_text",
+        "text": text,
+    }
+
+
+def _mrkdwn_section(text: str) -> dict:
+    return {
+        "type": "section",
+        "text": {
+            "type": "mrkdwn",
+            "text": text,
+        },
+    }
+
+
+def _confirm_dialog(text: str, confirm: str, deny: str) -> dict:
+    return {
+        "title": _plain_text(gettext("Are you sure?")),
+        "text": {
+            "type": "mrkdwn",
+            "text": text,
+        },
+        "confirm": _plain_text(confirm),
+        "deny": _plain_text(deny),
+    }
+
+
+def _welcome_header(botmydesk_user: BotMyDeskUser) -> dict:
+    return {
+        "type": "header",
+        "text": _plain_text(gettext(f"Hi {botmydesk_user.slack_name} 👋")),
+    }
+
+
+@_cached_per_locale
+def _welcome_introduction() -> dict:
+    return _mrkdwn_section(
+        gettext("My name is")
+        + f" {settings.BOTMYDESK_NAME}, "
+        + gettext(
+            "I'm an unofficial Slack bot for BookMyDesk. I can remind you to check-in at the office or at home. Making life a bit easier for you!"
+        )
+    )
+
+
+@_cached_per_locale
+def help_blocks(authorized: bool) -> list:
+    help_text = ""
+
+    if authorized:
+        help_text += (
+            "\nYou can *type* the following commands at any moment, at any chat.\n\n"
+        )
+        help_text += f"*`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_STATUS}`* or *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_STATUS_ALIAS_2}`*\n"
+        help_text += "_Show your BookMyDesk status today. Allows you to choose what to book for you today. Similar to notifications sent by BotMyDesk._\n\n\n"
+        help_text += f"👀 *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_WHO}`* or *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_WHO_ALIAS_2}`*\n"
+        help_text += "_Show who's in the office today, per floor._\n\n\n"
+        help_text += f"🏡 *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_AT_HOME}`* or *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_AT_HOME_ALIAS_2}`* \n"
+        help_text += "_Mark today as *working from home*. Will book a home spot for you, if you don't have one yet. No check-in required._\n"
+        help_text += f"_Add days to book multiple at once, e.g. *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_AT_HOME} week`* or *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_AT_HOME} mon,wed`*._\n\n\n"
+        help_text += f"🏢 *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_AT_OFFICE}`* or *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_AT_OFFICE_ALIAS_2}`* \n"
+        help_text += "_Mark today as *working from the office*. Only works if you already have a reservation. I will check you in though._\n"
+        help_text += "_Add days to check your office reservations on multiple days, e.g. *`week`* or *`mon,wed`*._\n\n\n"
+
+        if settings.BOTMYDESK_WORK_EXTERNALLY_LOCATION_NAME:
+            help_text += f"🚋 *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_EXTERNALLY}`* or *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_EXTERNALLY_ALIAS_2}`* \n"
+            help_text += "_Mark today as *working externally* (but not at home). Books an *'external' spot* for you if you don't have one yet. Checks you in as well._\n\n\n"
+
+        help_text += f"❌ *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_CANCELLED}`* or *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_CANCELLED_ALIAS_2}`*  or *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_CANCELLED_ALIAS_3}`*  or *`{settings.SLACK_SLASHCOMMAND_BMD} {settings.SLACK_SLASHCOMMAND_BMD_MARK_CANCELLED_ALIAS_4}`* \n"
+        help_text += "_*Removes* any pending reservation you have for today or, if you were checked in already, checks you out._\n\n ⚠️ _Care, each will be *applied instantly without confirmation*._\n\n\n"
+    else:
+        help_text += f"_More commands will be available after you've connected your account by typing *`{settings.SLACK_SLASHCOMMAND_BMD}`*_."
+
+    return [
+        {
+            "type": "header",
+            "text": _plain_text(f"{settings.BOTMYDESK_NAME} help"),
+        },
+        {
+            "type": "actions",
+            "elements": [
+                {
+                    "type": "button",
+                    "text": {
+                        "type": "plain_text",
+                        "emoji": True,
+                        "text": "⚙️",
+                    },
+                    "value": "open_preferences",
+                },
+            ],
+        },
+        {
+            "type": "context",
+            "elements": [
+                {"type": "mrkdwn", "text": help_text},
+            ],
+        },
+    ]
+
+
+@_cached_per_locale
+def _unauthorized_preferences_static() -> dict:
+    return {
+        "introduction": [
+            {"type": "divider"},
+            {
+                "type": "header",
+                "text": _plain_text(
+                    gettext("Connecting BookMyDesk to") + f" {settings.BOTMYDESK_NAME}"
+                ),
+            },
+            _mrkdwn_section(
+                gettext(
+                    "First, you will need to authorize me to access your BookMyDesk-account, presuming it's your Slack email address."
+                )
+            ),
+        ],
+        "footer": [
+            {"type": "divider"},
+            _mrkdwn_section(
+                gettext(
+                    "_You can disconnect me later at any time by accessing these preferences again._"
+                )
+            ),
+        ],
+        "connect_button": {
+            "type": "button",
+            "style": "primary",
+            "text": {
+                "type": "plain_text",
+                "text": gettext("Connect"),
+                "emoji": True,
+            },
+            "value": "send_bookmydesk_login_code",
+        },
+        "confirm_title": _plain_text(gettext("Are you sure?")),
+        "confirm_text_prefix": gettext("Request BookMyDesk login code by email for"),
+        "confirm_text_suffix": gettext("_You can enter the code on the next screen._"),
+        "confirm": _plain_text(gettext("Yes, email it")),
+        "deny": _plain_text(gettext("No, hold on")),
+    }
+
+
+def unauthorized_preferences_view(botmydesk_user: BotMyDeskUser) -> dict:
+    static = _unauthorized_preferences_static()
+    connect_button = dict(static["connect_button"])
+    connect_button["confirm"] = {
+        "title": static["confirm_title"],
+        "text": {
+            "type": "mrkdwn",
+            "text": static["confirm_text_prefix"]
+            + f" *{botmydesk_user.slack_email}*?\n\n"
+            + static["confirm_text_suffix"],
+        },
+        "confirm": static["confirm"],
+        "deny": static["deny"],
+    }
+
+    return {
+        "type": "modal",
+        "callback_id": "bmd-unauthorized-welcome",
+        "title": _plain_text(gettext("Hi") + f"{botmydesk_user.slack_name} 👋"),
+        "blocks": [
+            *static["introduction"],
+            {
+                "type": "actions",
+                "elements": [connect_button],
+            },
+            *static["footer"],
+        ],
+    }
+
+
+@_cached_per_locale
+def preferences_loading_view() -> dict:
+    return {
+        "type": "modal",
+        "callback_id": "bmd-authorized-welcome",
+        "title": _plain_text("⚙️ " + gettext("Preferences")),
+        "blocks": [
+            _mrkdwn_section(gettext("_Loading your preferences..._")),
+        ],
+    }
+
+
+def _select_option(text: str, value: str) -> dict:
+    return {
+        "text": _plain_text(text),
+        "value": value,
+    }
+
+
+def _select_section(text: str, action_id: str, options) -> dict:
+    return {
+        "type": "section",
+        "text": {
+            "type": "mrkdwn",
+            "text": text,
+        },
+        "accessory": {
+            "action_id": action_id,
+            "type": "static_select",
+            "placeholder": _plain_text(gettext("Select an item")),
+            "options": options,
+        },
+    }
+
+
+@_cached_per_locale
+def _authorized_preferences_static() -> dict:
+    disabled_option = _select_option(gettext("No"), "-")
+    notification_preference_mapping = {
+        None: disabled_option,
+        datetime.time(hour=7): _select_option(gettext("Around 7:00"), "07:00"),
+        datetime.time(hour=7, minute=30): _select_option(
+            gettext("Around 7:30"), "07:30"
+        ),
+        datetime.time(hour=8): _select_option(gettext("Around 8:00"), "08:00"),
+        datetime.time(hour=8, minute=30): _select_option(
+            gettext("Around 8:30"), "08:30"
+        ),
+        datetime.time(hour=9): _select_option(gettext("Around 9:00"), "09:00"),
+    }
+    notification_options = list(notification_preference_mapping.values())
+
+    locale_options = {
+        BotMyDeskUser.DUTCH_LOCALE: _select_option(
+            gettext("Dutch (locales broken)"), BotMyDeskUser.DUTCH_LOCALE
+        ),
+        BotMyDeskUser.ENGLISH_LOCALE: _select_option(
+            gettext("English"), BotMyDeskUser.ENGLISH_LOCALE
+        ),
+    }
+
+    return {
+        "title": _plain_text("⚙️ " + gettext("Preferences")),
+        "disabled_option": disabled_option,
+        "notification_preference_mapping": notification_preference_mapping,
+        "locale_options": locale_options,
+        "locale_section": _select_section(
+            gettext("Preferred language:"),
+            "preferred_locale",
+            (
+                locale_options[BotMyDeskUser.DUTCH_LOCALE],
+                locale_options[BotMyDeskUser.ENGLISH_LOCALE],
+            ),
+        ),
+        "notification_introduction": _mrkdwn_section(
+            gettext(
+                "Select the days to receive a Slack reminder on for your BookMyDesk status:"
+            )
+        ),
+        # Mapped to the user preference field, in order of display.
+        "notification_sections": {
+            "preferred_notification_time_on_mondays": _select_section(
+                gettext("Notify you on *mondays*?"),
+                "monday_notification_at",
+                notification_options,
+            ),
+            "preferred_notification_time_on_tuesdays": _select_section(
+                gettext("Notify you on *tuesdays*?"),
+                "tuesday_notification_at",
+                notification_options,
+            ),
+            "preferred_notification_time_on_wednesdays": _select_section(
+                gettext("Notify you on *wednesdays*?"),
+                "wednesday_notification_at",
+                notification_options,
+            ),
+            "preferred_notification_time_on_thursdays": _select_section(
+                gettext("Notify you on *thursdays*?"),
+                "thursday_notification_at",
+                notification_options,
+            ),
+            "preferred_notification_time_on_fridays": _select_section(
+                gettext("Notify you on *fridays*?"),
+                "friday_notification_at",
+                notification_options,
+            ),
+        },
+        "connected_to_prefix": gettext("_Connected to BookMyDesk account of"),
+        "disconnect_actions": {
+            "type": "actions",
+            "elements": [
+                {
+                    "type": "button",
+                    "style": "danger",
+                    "text": {
+                        "type": "plain_text",
+                        "text": gettext("Disconnect") + f" {settings.BOTMYDESK_NAME}",
+                        "emoji": True,
+                    },
+                    "confirm": _confirm_dialog(
+                        gettext(
+                            "This will log me out of your BookMyDesk-account and I won't bother you anymore.\n\n*Disconnect me from your account in BookMyDesk?*"
+                        ),
+                        gettext("Yes, disconnect"),
+                        gettext("Nevermind, keep connected"),
+                    ),
+                    "value": "revoke_botmydesk",
+                },
+            ],
+        },
+    }
+
+
+def _with_initial_option(select_section: dict, initial_option: dict) -> dict:
+    return {
+        **select_section,
+        "accessory": {
+            **select_section["accessory"],
+            "initial_option": initial_option,
+        },
+    }
+
+
+def authorized_preferences_view(botmydesk_user: BotMyDeskUser, full_name: str) -> dict:
+    static = _authorized_preferences_static()
+    initial_locale = (
+        static["locale_options"][BotMyDeskUser.DUTCH_LOCALE]
+        if botmydesk_user.preferred_locale == BotMyDeskUser.DUTCH_LOCALE
+        else static["locale_options"][BotMyDeskUser.ENGLISH_LOCALE]
+    )
+
+    blocks = [
+        _with_initial_option(static["locale_section"], initial_locale),
+        static["notification_introduction"],
+    ]
+
+    for preference_field, section in static["notification_sections"].items():
+        initial_preference = (
+            static["notification_preference_mapping"][
+                getattr(botmydesk_user, preference_field)
+            ]
+            or static["disabled_option"]
+        )
+        blocks.append(_with_initial_option(section, initial_preference))
+
+    # @TODO Implement dont_bug_me_when_not_needed some day
+    blocks.extend(
+        [
+            {"type": "divider"},
+            _mrkdwn_section(static["connected_to_prefix"] + f" *{full_name}*_"),
+            static["disconnect_actions"],
+        ]
+    )
+
+    return {
+        "type": "modal",
+        "callback_id": "bmd-authorized-welcome",
+        "title": static["title"],
+        "blocks": blocks,
+    }
+
+
+@_cached_per_locale
+def _authorized_app_home_actions() -> dict:
+    return {
+        "type": "actions",
+        "elements": [
+            {
+                "type": "button",
+                "text": {
+                    "type": "plain_text",
+                    "emoji": True,
+                    "text": "⚙️ " + gettext("Preferences"),
+                },
+                "value": "open_preferences",
+            },
+            {
+                "type": "button",
+                "text": {
+                    "type": "plain_text",
+                    "emoji": True,
+                    "text": gettext("Help / Commands"),
+                },
+                "value": "trigger_help",
+            },
+        ],
+    }
+
+
+def authorized_app_home_blocks(upcoming_reservations_blocks: list) -> list:
+    return [_authorized_app_home_actions(), *upcoming_reservations_blocks]
+
+
+@_cached_per_locale
+def _unauthorized_app_home_static() -> dict:
+    return {
+        "actions": {
+            "type": "actions",
+            "elements": [
+                {
+                    "type": "button",
+                    "style": "primary",
+                    "text": {
+                        "type": "plain_text",
+                        "emoji": True,
+                        "text": "🔗️ " + gettext("Link BookMyDesk"),
+                    },
+                    "value": "open_preferences",
+                },
+            ],
+        },
+        "link_instruction": _mrkdwn_section(
+            gettext("Click the button above to link your BookMyDesk account.")
+        ),
+    }
+
+
+def unauthorized_app_home_blocks(botmydesk_user: BotMyDeskUser) -> list:
+    static = _unauthorized_app_home_static()
+
+    return [
+        static["actions"],
+        _welcome_header(botmydesk_user),
+        _welcome_introduction(),
+        static["link_instruction"],
+    ]
+
+
+@_cached_per_locale
+def _app_home_opened_welcome_static() -> dict:
+    return {
+        "actions": {
+            "type": "actions",
+            "elements": [
+                {
+                    "type": "button",
+                    "text": {
+                        "type": "plain_text",
+                        "emoji": True,
+                        "text": f"⚙️ {settings.BOTMYDESK_NAME} "
+                        + gettext("preferences"),
+                    },
+                    "value": "open_preferences",
+                },
+            ],
+        },
+        "link_instruction": _mrkdwn_section(
+            gettext(
+                "Click the preferences button above to link your BookMyDesk account to me."
+            )
+        ),
+    }
+
+
+def app_home_opened_welcome_blocks(botmydesk_user: BotMyDeskUser) -> list:
+    static = _app_home_opened_welcome_static()
+
+    return [
+        static["actions"],
+        _welcome_header(botmydesk_user),
+        _welcome_introduction(),
+        static["link_instruction"],
+    ]
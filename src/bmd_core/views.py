@@ -0,0 +1,29 @@
+import secrets
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, Http404
+from django.views import View
+
+import bmd_core.metrics
+
+
+class MetricsView(View):
+    """Prometheus scrape target. Requires the metrics token as bearer token."""
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        if not settings.BOTMYDESK_METRICS_TOKEN:
+            raise Http404()
+
+        if not secrets.compare_digest(
+            request.headers.get("Authorization", ""),
+            f"Bearer {settings.BOTMYDESK_METRICS_TOKEN}",
+        ):
+            return HttpResponse(status=401)
+
+        # Include anything collected by this process so far.
+        bmd_core.metrics.flush()
+
+        return HttpResponse(
+            bmd_core.metrics.render_prometheus(),
+            content_type="text/plain; version=0.0.4",
+        )
@@ -1,4 +1,3 @@
-from pprint import pformat
 import logging
 
 from slack_sdk.socket_mode import SocketModeClient
@@ -8,6 +7,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.utils.autoreload import run_with_reloader
 from django.conf import settings
 
+from bmd_core.logging_utils import LazyPformat
 import bmd_core.services
 import bmd_hooks.services.callbacks
 
@@ -49,18 +49,17 @@ class Command(BaseCommand):
         Event().wait()
 
     def _on_incoming_request(self, client: SocketModeClient, req: SocketModeRequest):
-        payload_dump = pformat(req.payload, indent=2)
         botmydesk_logger.debug(
-            f"Socket Mode: Incoming '{req.type}' ({req.envelope_id}) with payload:\n{payload_dump}"
+            "Socket Mode: Incoming '%s' (%s) with payload:\n%s",
+            req.type,
+            req.envelope_id,
+            LazyPformat(req.payload),
         )
 
         try:
-            callback_module = {
-                # Similar mapping as views for incoming webhooks, but without validation.
-                "events_api": bmd_hooks.services.callbacks.on_event,
-                "slash_commands": bmd_hooks.services.callbacks.on_slash_command,
-                "interactive": bmd_hooks.services.callbacks.on_interactivity,
-            }[req.type]
+            callback_module = bmd_hooks.services.callbacks.socket_mode_callback(
+                req.type
+            )
         except KeyError:
             botmydesk_logger.error(f"Unsupported request type: {req.type}")
             return
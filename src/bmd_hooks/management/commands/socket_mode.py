@@ -0,0 +1,226 @@
+import logging
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from slack_sdk.socket_mode import SocketModeClient
+from slack_sdk.socket_mode.request import SocketModeRequest
+from slack_sdk.socket_mode.response import SocketModeResponse
+
+import bmd_core.metrics
+import bmd_core.services
+import bmd_hooks.services.callbacks
+
+
+botmydesk_logger = logging.getLogger("botmydesk")
+
+
+class Command(BaseCommand):
+    """Alternative to hosting webhooks, e.g. behind a firewall. Slack delivers each request to one of the connections."""
+
+    help = "Run in Socket Mode, using multiple connections and a bounded pool of workers handling requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--connections",
+            type=int,
+            default=settings.BOTMYDESK_SOCKET_MODE_CONNECTIONS,
+            help="WebSocket connections to maintain, for redundancy. Slack allows up to 10.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.BOTMYDESK_SOCKET_MODE_WORKERS,
+            help="Requests handled concurrently. Any more are queued.",
+        )
+        parser.add_argument(
+            "--queue-size",
+            type=int,
+            default=settings.BOTMYDESK_SOCKET_MODE_QUEUE_SIZE,
+            help="Requests queued before connections stop receiving more, until workers catch up.",
+        )
+        parser.add_argument(
+            "--stats-interval",
+            type=int,
+            default=60,
+            help="Seconds between logging stats per connection.",
+        )
+
+    def handle(self, **options):
+        if not settings.SLACK_APP_TOKEN:
+            raise CommandError("Requires SLACK_APP_TOKEN to be set")
+
+        self._stopping = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=options["workers"], thread_name_prefix="socket_mode_worker"
+        )
+        # Bounds the queue of the executor, as it's unbounded itself.
+        self._capacity = threading.BoundedSemaphore(
+            options["workers"] + options["queue_size"]
+        )
+        self._stats: List[_ConnectionStats] = []
+        socket_mode_clients = []
+
+        signal.signal(signal.SIGTERM, self._on_stop_signal)
+        signal.signal(signal.SIGINT, self._on_stop_signal)
+
+        for number in range(options["connections"]):
+            stats = _ConnectionStats(number)
+            socket_mode_client = SocketModeClient(
+                app_token=settings.SLACK_APP_TOKEN,
+                web_client=bmd_core.services.slack_web_client(),
+            )
+            socket_mode_client.socket_mode_request_listeners.append(
+                self._listener(stats)
+            )
+            socket_mode_client.connect()
+
+            self._stats.append(stats)
+            socket_mode_clients.append(socket_mode_client)
+
+        botmydesk_logger.info(
+            f"Listening to Slack in Socket Mode using {options['connections']} connection(s) and {options['workers']} worker(s)"
+        )
+
+        while not self._stopping.wait(options["stats_interval"]):
+            self._log_stats()
+
+        botmydesk_logger.info("Stopping: No longer receiving, finishing requests...")
+
+        for current in socket_mode_clients:
+            current.close()
+
+        self._executor.shutdown(wait=True)
+        self._log_stats()
+        botmydesk_logger.info("Stopped")
+
+    def _on_stop_signal(self, signal_number: int, _):
+        botmydesk_logger.info(f"Received signal {signal_number}")
+        self._stopping.set()
+
+    def _listener(self, stats: "_ConnectionStats") -> Callable:
+        def on_incoming_request(client: SocketModeClient, req: SocketModeRequest):
+            # Ack first, as Slack requires this within 3 seconds.
+            client.send_socket_mode_response(
+                SocketModeResponse(envelope_id=req.envelope_id)
+            )
+            stats.received()
+
+            try:
+                callback = bmd_hooks.services.callbacks.socket_mode_callback(req.type)
+            except KeyError:
+                botmydesk_logger.error(f"Unsupported request type: {req.type}")
+                return
+
+            if self._stopping.is_set():
+                botmydesk_logger.warning(
+                    f"Dropped '{req.type}' ({req.envelope_id}) while stopping"
+                )
+                stats.dropped()
+                return
+
+            # Blocks this connection only when all workers are busy and the queue is full.
+            self._capacity.acquire()
+
+            try:
+                self._executor.submit(self._process, stats, callback, req.payload)
+            except RuntimeError:
+                # Shut down while we were waiting above.
+                self._capacity.release()
+                botmydesk_logger.warning(
+                    f"Dropped '{req.type}' ({req.envelope_id}) while stopping"
+                )
+                stats.dropped()
+
+        return on_incoming_request
+
+    def _process(self, stats: "_ConnectionStats", callback: Callable, payload: dict):
+        start = time.monotonic()
+        close_old_connections()
+
+        try:
+            callback(payload)
+        except Exception as error:
+            bmd_hooks.services.callbacks.on_error(error)
+            stats.processed(time.monotonic() - start, failed=True)
+        else:
+            stats.processed(time.monotonic() - start, failed=False)
+        finally:
+            close_old_connections()
+            self._capacity.release()
+
+    def _log_stats(self):
+        for current in self._stats:
+            botmydesk_logger.info(
+                f"Socket Mode connection #{current.number}",
+                extra=current.snapshot(),
+            )
+
+
+class _ConnectionStats:
+    """Throughput of a single connection, since the last snapshot."""
+
+    def __init__(self, number: int):
+        self.number = number
+        self._lock = threading.Lock()
+        self._last_snapshot = time.monotonic()
+        self._received = self._processed = self._failed = self._dropped = 0
+        self._duration = 0.0
+
+    def received(self):
+        with self._lock:
+            self._received += 1
+
+        bmd_core.metrics.increment(
+            "botmydesk_socket_mode_requests_total",
+            connection=self.number,
+            result="received",
+        )
+
+    def dropped(self):
+        with self._lock:
+            self._dropped += 1
+
+        bmd_core.metrics.increment(
+            "botmydesk_socket_mode_requests_total",
+            connection=self.number,
+            result="dropped",
+        )
+
+    def processed(self, duration: float, failed: bool):
+        with self._lock:
+            self._processed += 1
+            self._failed += int(failed)
+            self._duration += duration
+
+        bmd_core.metrics.increment(
+            "botmydesk_socket_mode_requests_total",
+            connection=self.number,
+            result="failed" if failed else "processed",
+        )
+
+    def snapshot(self) -> dict:
+        """Returns the stats and resets them."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_snapshot
+            result = {
+                "received": self._received,
+                "processed": self._processed,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "per_second": round(self._processed / elapsed, 2) if elapsed else 0,
+                "avg_ms": round(self._duration / self._processed * 1000)
+                if self._processed
+                else 0,
+            }
+            self._last_snapshot = now
+            self._received = self._processed = self._failed = self._dropped = 0
+            self._duration = 0.0
+
+        return result
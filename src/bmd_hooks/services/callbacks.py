@@ -1,12 +1,17 @@
+import contextlib
 import logging
+import time
 import traceback
-import pprint
-from typing import Optional
+from typing import Callable, Optional
 
 from django.conf import settings
 from django.utils.translation import gettext
 
+from bmd_core.logging_utils import LazyPformat
+import bmd_core.metrics
+import bmd_core.profiling
 import bmd_core.services
+import bmd_core.tracing
 import bmd_hooks.services.slash
 import bmd_hooks.services.interactivity
 import bmd_hooks.services.event
@@ -17,84 +22,111 @@ botmydesk_logger = logging.getLogger("botmydesk")
 
 def on_event(payload: dict):
     """https://api.slack.com/events"""
-    botmydesk_logger.info(
-        f"Processing Slack event: {pprint.pformat(payload, indent=2)}"
-    )
+    botmydesk_logger.debug("Processing Slack event: %s", LazyPformat(payload))
     event_type = payload["event"]["type"]
 
     try:
         service_module = {
             "app_home_opened": bmd_hooks.services.event.handle_app_home_opened_event,
+            "user_change": bmd_hooks.services.event.handle_user_change_event,
         }[event_type]
     except KeyError:
         raise NotImplementedError(f"Event unknown or not implemented: {event_type}")
 
-    service_module(payload)
+    # Either the user ID or the user info.
+    slack_user = payload["event"].get("user")
+    slack_user_id = slack_user["id"] if isinstance(slack_user, dict) else slack_user
+
+    # Events are quite frequent and not that interesting.
+    with _log_processing("event", slack_user_id, event_type, sampled=True):
+        service_module(payload)
 
 
 def on_slash_command(payload: dict):
     """https://api.slack.com/interactivity/slash-commands"""
+    botmydesk_logger.debug("Processing Slack slash command: %s", LazyPformat(payload))
     command = payload["command"]
-    botmydesk_logger.info(f"Processing Slack slash command: {command}")
     slack_user_id = payload["user_id"]
 
-    try:
-        bmd_core.services.validate_botmydesk_user(slack_user_id=slack_user_id)
-    except EnvironmentError as error:
-        return on_error(error, slack_user_id=slack_user_id)
-
-    botmydesk_user = bmd_core.services.get_botmydesk_user(slack_user_id)
-    bmd_core.services.apply_user_locale(botmydesk_user)
-
-    try:
-        service_module = {
-            settings.SLACK_SLASHCOMMAND_BMD: bmd_hooks.services.slash.handle_slash_command,
-        }[command]
-    except KeyError:
-        raise NotImplementedError(
-            f"Slash command unknown or not implemented: {command}"
-        )
+    with _log_processing(
+        "slash command", slack_user_id, f"{command} {payload['text'].strip()}"
+    ), bmd_core.profiling.profile("slash_command", slack_user_id):
+        try:
+            bmd_core.services.validate_botmydesk_user(slack_user_id=slack_user_id)
+        except EnvironmentError as error:
+            return on_error(error, slack_user_id=slack_user_id)
+
+        botmydesk_user = bmd_core.services.get_botmydesk_user(slack_user_id)
+        bmd_core.services.apply_user_locale(botmydesk_user)
+
+        try:
+            service_module = {
+                settings.SLACK_SLASHCOMMAND_BMD: bmd_hooks.services.slash.handle_slash_command,
+            }[command]
+        except KeyError:
+            raise NotImplementedError(
+                f"Slash command unknown or not implemented: {command}"
+            )
 
-    service_module(botmydesk_user, payload)
+        service_module(botmydesk_user, payload)
 
 
 def on_interactivity(payload: dict):
     """https://api.slack.com/interactivity"""
-    botmydesk_logger.info(
-        f"Processing Slack interactivity: {pprint.pformat(payload, indent=2)}"
-    )
+    botmydesk_logger.debug("Processing Slack interactivity: %s", LazyPformat(payload))
     slack_user_id = payload["user"]["id"]
 
-    try:
-        bmd_core.services.validate_botmydesk_user(slack_user_id=slack_user_id)
-    except EnvironmentError as error:
-        return on_error(error, slack_user_id=slack_user_id)
-
-    botmydesk_user = bmd_core.services.get_botmydesk_user(slack_user_id=slack_user_id)
-    bmd_core.services.apply_user_locale(botmydesk_user)
-
-    # Handle submits.
     if payload["type"] == "view_submission":
-        response_payload = (
-            bmd_hooks.services.interactivity.on_interactive_view_submission(
-                botmydesk_user, payload
-            )
+        action = payload["view"]["callback_id"]
+    else:
+        action = ",".join(
+            x.get("value") or x.get("action_id", "") for x in payload.get("actions", [])
         )
 
-        # Conditional response. E.g. for closing modal dialogs or form errors.
-        if response_payload is not None:
-            # @TODO respond with response_payload?
-            pass
-
-    # Handle UX updates.
-    elif payload["type"] == "block_actions":
-        for current_action in payload["actions"]:
-            bmd_hooks.services.interactivity.on_interactive_block_action(
-                botmydesk_user,
-                current_action,
-                payload,
+    with _log_processing(
+        payload["type"], slack_user_id, action
+    ), bmd_core.profiling.profile(payload["type"], slack_user_id):
+        try:
+            bmd_core.services.validate_botmydesk_user(slack_user_id=slack_user_id)
+        except EnvironmentError as error:
+            return on_error(error, slack_user_id=slack_user_id)
+
+        botmydesk_user = bmd_core.services.get_botmydesk_user(
+            slack_user_id=slack_user_id
+        )
+        bmd_core.services.apply_user_locale(botmydesk_user)
+
+        # Handle submits.
+        if payload["type"] == "view_submission":
+            response_payload = (
+                bmd_hooks.services.interactivity.on_interactive_view_submission(
+                    botmydesk_user, payload
+                )
             )
 
+            # Conditional response. E.g. for closing modal dialogs or form errors.
+            if response_payload is not None:
+                # @TODO respond with response_payload?
+                pass
+
+        # Handle UX updates.
+        elif payload["type"] == "block_actions":
+            for current_action in payload["actions"]:
+                bmd_hooks.services.interactivity.on_interactive_block_action(
+                    botmydesk_user,
+                    current_action,
+                    payload,
+                )
+
+
+def socket_mode_callback(request_type: str) -> Callable[[dict], None]:
+    """Similar mapping as views for incoming webhooks, but for Socket Mode. Raises KeyError when unsupported."""
+    return {
+        "events_api": on_event,
+        "slash_commands": on_slash_command,
+        "interactive": on_interactivity,
+    }[request_type]
+
 
 def on_error(error: Exception, slack_user_id: Optional[str] = None):
     """For stacktrace log, optionally DM user as well."""
@@ -151,3 +183,41 @@ def on_error(error: Exception, slack_user_id: Optional[str] = None):
             },
         ],
     ).validate()
+
+
+@contextlib.contextmanager
+def _log_processing(
+    request_type: str, slack_user_id: Optional[str], action: str, sampled=False
+):
+    """Logs the request processed, along with some structured info about it. Records metrics and traces as well."""
+    start = time.monotonic()
+    status = "error"
+
+    try:
+        with bmd_core.tracing.span(
+            f"slack {request_type}", slack_user_id=slack_user_id, action=action
+        ):
+            yield
+
+        status = "ok"
+    finally:
+        duration = time.monotonic() - start
+        bmd_core.metrics.observe(
+            "botmydesk_slack_callback_duration_seconds", duration, type=request_type
+        )
+        bmd_core.metrics.increment(
+            "botmydesk_slack_callbacks_total", type=request_type, status=status
+        )
+        bmd_core.metrics.flush_if_due()
+        botmydesk_logger.info(
+            "Processed Slack %s",
+            request_type,
+            extra={
+                "slack_user_id": slack_user_id,
+                "action": action,
+                "latency_ms": round(duration * 1000),
+                "sampled": sampled,
+                "trace_id": bmd_core.tracing.current_trace_id(),
+            },
+            stacklevel=3,  # Log as caller
+        )
@@ -1,9 +1,8 @@
 import logging
 
-from django.conf import settings
-from django.utils.translation import gettext
-
+import bmd_core.models
 import bmd_core.services
+import bmd_core.view_templates
 
 
 botmydesk_logger = logging.getLogger("botmydesk")
@@ -26,62 +25,31 @@ def handle_app_home_opened_event(payload: dict):
     botmydesk_user = bmd_core.services.get_botmydesk_user(slack_user_id)
 
     if botmydesk_user.has_authorized_bot():
-        # Do not trigger for known users.
+        # Render in the background, after acking the event. Unless rendered recently, as users tend to switch tabs a lot.
+        if bmd_core.services.claim_app_home_freshness(botmydesk_user):
+            bmd_core.services.schedule_app_home_update(botmydesk_user)
+
         return
 
     # New or unauthorized bot users. Give them a welcome.
     bmd_core.services.apply_user_locale(botmydesk_user)
 
     # Always show preferences button
-    blocks = [
-        {
-            "type": "actions",
-            "elements": [
-                {
-                    "type": "button",
-                    "text": {
-                        "type": "plain_text",
-                        "emoji": True,
-                        "text": f"⚙️ {settings.BOTMYDESK_NAME} "
-                        + gettext("preferences"),
-                    },
-                    "value": "open_preferences",
-                },
-            ],
-        },
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": gettext(f"Hi {botmydesk_user.slack_name} 👋"),
-            },
-        },
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": gettext("My name is")
-                + f" {settings.BOTMYDESK_NAME}, "
-                + gettext(
-                    "I'm an unofficial Slack bot for BookMyDesk. I can remind you to check-in at the office or at home. Making life a bit easier for you!"
-                ),
-            },
-        },
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": gettext(
-                    "Click the preferences button above to link your BookMyDesk account to me."
-                ),
-            },
-        },
-    ]
-
-    bmd_core.services.slack_web_client().views_publish(
-        user_id=botmydesk_user.slack_user_id,
-        view={
-            "type": "home",
-            "blocks": blocks,
-        },
-    ).validate()
+    blocks = bmd_core.view_templates.app_home_opened_welcome_blocks(botmydesk_user)
+
+    bmd_core.services.publish_app_home_view(botmydesk_user, blocks)
+
+
+def handle_user_change_event(payload: dict):
+    """https://api.slack.com/events/user_change"""
+    slack_user = payload["event"]["user"]
+
+    try:
+        botmydesk_user = bmd_core.models.BotMyDeskUser.objects.by_slack_id(
+            slack_user_id=slack_user["id"]
+        )
+    except bmd_core.models.BotMyDeskUser.DoesNotExist:
+        # Not our concern, yet.
+        return
+
+    bmd_core.services.update_slack_profile(botmydesk_user, slack_user)
@@ -10,6 +10,7 @@ from bmd_api_client.exceptions import BookMyDeskException
 from bmd_core.models import BotMyDeskUser
 import bmd_api_client.client
 import bmd_core.services
+import bmd_core.tracing
 import bmd_hooks.services.slash
 
 
@@ -47,7 +48,8 @@ def on_interactive_block_action(
         except KeyError:
             raise NotImplementedError(f"Unknown action value: {action_value}")
         else:
-            return service_module(botmydesk_user, payload)
+            with bmd_core.tracing.span(service_module.__name__):
+                return service_module(botmydesk_user, payload)
 
     if action_id:
         try:
@@ -63,7 +65,8 @@ def on_interactive_block_action(
         except KeyError:
             raise NotImplementedError(f"Unknown action ID: {action_id}")
         else:
-            return service_module(botmydesk_user, action_payload)
+            with bmd_core.tracing.span(service_module.__name__):
+                return service_module(botmydesk_user, action_payload)
 
 
 def on_interactive_view_submission(
@@ -78,7 +81,8 @@ def on_interactive_view_submission(
     except KeyError:
         raise NotImplementedError(f"Unknown view callback ID: {view_callback_id}")
 
-    return service_module(botmydesk_user, payload)
+    with bmd_core.tracing.span(service_module.__name__):
+        return service_module(botmydesk_user, payload)
 
 
 def handle_interactive_send_bookmydesk_login_code(
@@ -205,56 +209,33 @@ def handle_user_preference_update(botmydesk_user: BotMyDeskUser, action_payload:
     if selected_option_value == "-":
         selected_option_value = None
 
-    if action_id == "preferred_locale":
-        botmydesk_user.update(preferred_locale=selected_option_value)
-        botmydesk_logger.info(
-            f"(@{botmydesk_user.slack_user_id}: Updated 'preferred_locale' to {selected_option_value}"
-        )
-    elif action_id == "monday_notification_at":
-        botmydesk_user.update(
-            preferred_notification_time_on_mondays=selected_option_value
-        )
-        botmydesk_logger.info(
-            f"(@{botmydesk_user.slack_user_id}: Updated 'preferred_notification_time_on_mondays' to {selected_option_value}"
-        )
-    elif action_id == "tuesday_notification_at":
-        botmydesk_user.update(
-            preferred_notification_time_on_tuesdays=selected_option_value
-        )
-        botmydesk_logger.info(
-            f"(@{botmydesk_user.slack_user_id}: Updated 'preferred_notification_time_on_tuesdays' to {selected_option_value}"
-        )
-    elif action_id == "wednesday_notification_at":
-        botmydesk_user.update(
-            preferred_notification_time_on_wednesdays=selected_option_value
-        )
-        botmydesk_logger.info(
-            f"(@{botmydesk_user.slack_user_id}: Updated 'preferred_notification_time_on_wednesdays' to {selected_option_value}"
-        )
-    elif action_id == "thursday_notification_at":
-        botmydesk_user.update(
-            preferred_notification_time_on_thursdays=selected_option_value
-        )
-        botmydesk_logger.info(
-            f"(@{botmydesk_user.slack_user_id}: Updated 'preferred_notification_time_on_thursdays' to {selected_option_value}"
-        )
-    elif action_id == "friday_notification_at":
-        botmydesk_user.update(
-            preferred_notification_time_on_fridays=selected_option_value
-        )
-        botmydesk_logger.info(
-            f"(@{botmydesk_user.slack_user_id}: Updated 'preferred_notification_time_on_fridays' to {selected_option_value}"
-        )
-    elif action_id == "dont_bug_me_when_not_needed":
-        botmydesk_user.update(
-            prefer_only_notifications_when_needed=selected_option_value  # Auto-convert to bool
-        )
-        botmydesk_logger.info(
-            f"(@{botmydesk_user.slack_user_id}: Updated 'prefer_only_notifications_when_needed' to {selected_option_value}"
-        )
-    else:
+    try:
+        field_name = {
+            "preferred_locale": "preferred_locale",
+            "monday_notification_at": "preferred_notification_time_on_mondays",
+            "tuesday_notification_at": "preferred_notification_time_on_tuesdays",
+            "wednesday_notification_at": "preferred_notification_time_on_wednesdays",
+            "thursday_notification_at": "preferred_notification_time_on_thursdays",
+            "friday_notification_at": "preferred_notification_time_on_fridays",
+            "dont_bug_me_when_not_needed": "prefer_only_notifications_when_needed",  # Auto-convert to bool
+        }[action_id]
+    except KeyError:
         raise NotImplementedError(f"No handle_user_preference_update() for {action_id}")
 
+    # Users tend to reselect the same value.
+    if not botmydesk_user.update(**{field_name: selected_option_value}):
+        botmydesk_logger.debug(
+            f"(@{botmydesk_user.slack_user_id}: '{field_name}' unchanged"
+        )
+        return
+
+    botmydesk_logger.info(
+        f"(@{botmydesk_user.slack_user_id}: Updated '{field_name}' to {selected_option_value}"
+    )
+
+    # E.g. the locale affects the app home.
+    bmd_core.services.schedule_app_home_update(botmydesk_user)
+
 
 def handle_interactive_bmd_authorize_login_code_submit(
     botmydesk_user: BotMyDeskUser, payload: dict
@@ -330,6 +311,6 @@ def handle_interactive_bmd_authorize_login_code_submit(
         ],
     ).validate()
 
-    bmd_core.services.update_user_app_home(botmydesk_user=botmydesk_user)
+    bmd_core.services.schedule_app_home_update(botmydesk_user)
 
     return {"response_action": "clear"}
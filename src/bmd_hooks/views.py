@@ -6,6 +6,7 @@ from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseBad
 from django.views import View
 from slack_sdk.signature import SignatureVerifier
 
+import bmd_core.tracing
 import bmd_hooks.services.callbacks
 
 
@@ -33,10 +34,11 @@ class SlackEventView(View):
             # @see https://api.slack.com/events/url_verification
             return JsonResponse({"challenge": payload.get("challenge")})
 
-        try:
-            bmd_hooks.services.callbacks.on_event(payload)
-        except Exception as error:
-            bmd_hooks.services.callbacks.on_error(error)
+        with bmd_core.tracing.span(f"POST {request.path}"):
+            try:
+                bmd_hooks.services.callbacks.on_event(payload)
+            except Exception as error:
+                bmd_hooks.services.callbacks.on_error(error)
 
         return HttpResponse()
 
@@ -51,10 +53,11 @@ class SlackInteractivityView(View):
 
         payload = json.loads(request.POST.get("payload"))
 
-        try:
-            bmd_hooks.services.callbacks.on_interactivity(payload)
-        except Exception as error:
-            bmd_hooks.services.callbacks.on_error(error)
+        with bmd_core.tracing.span(f"POST {request.path}"):
+            try:
+                bmd_hooks.services.callbacks.on_interactivity(payload)
+            except Exception as error:
+                bmd_hooks.services.callbacks.on_error(error)
 
         return HttpResponse()
 
@@ -69,9 +72,10 @@ class SlackSlashCommandView(View):
 
         payload = request.POST.dict()
 
-        try:
-            bmd_hooks.services.callbacks.on_slash_command(payload)
-        except Exception as error:
-            bmd_hooks.services.callbacks.on_error(error)
+        with bmd_core.tracing.span(f"POST {request.path}"):
+            try:
+                bmd_hooks.services.callbacks.on_slash_command(payload)
+            except Exception as error:
+                bmd_hooks.services.callbacks.on_error(error)
 
         return HttpResponse()
@@ -3,6 +3,7 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from kombu import Exchange, Queue
 
 
 # Set the default Django settings module for the 'celery' program.
@@ -18,19 +19,115 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
+
+# Separate queues, so batches never starve anything users are waiting for. Run dedicated workers per queue to scale.
+INTERACTIVE_QUEUE = "interactive"
+NOTIFICATIONS_QUEUE = "notifications"
+MAINTENANCE_QUEUE = "maintenance"
+QUEUES = (INTERACTIVE_QUEUE, NOTIFICATIONS_QUEUE, MAINTENANCE_QUEUE)
+
+app.conf.task_queues = [Queue(x, Exchange(x), routing_key=x) for x in QUEUES]
+app.conf.task_default_queue = INTERACTIVE_QUEUE
+app.conf.task_queue_max_priority = 10
+app.conf.task_default_priority = 5
+app.conf.task_routes = {
+    "bmd_core.tasks.update_botmydesk_app_home": {
+        "queue": INTERACTIVE_QUEUE,
+        "priority": 9,
+    },
+    "bmd_core.tasks.book_multiple_days": {
+        "queue": INTERACTIVE_QUEUE,
+        "priority": 9,
+    },
+    "bmd_core.tasks.refresh_user_company_occupancy": {
+        "queue": INTERACTIVE_QUEUE,
+        "priority": 9,
+    },
+    "bmd_core.tasks.dispatch_botmydesk_notifications": {
+        "queue": NOTIFICATIONS_QUEUE,
+        "priority": 7,
+    },
+    "bmd_core.tasks.check_out_at_end_of_day": {
+        "queue": NOTIFICATIONS_QUEUE,
+        "priority": 5,
+    },
+    "bmd_core.tasks.detect_reservation_changes": {
+        "queue": NOTIFICATIONS_QUEUE,
+        "priority": 5,
+    },
+    "bmd_core.tasks.refresh_all_bookmydesk_sessions": {
+        "queue": MAINTENANCE_QUEUE,
+        "priority": 3,
+    },
+    "bmd_core.tasks.sync_botmydesk_app_homes_on_date_rollover": {
+        "queue": MAINTENANCE_QUEUE,
+        "priority": 3,
+    },
+    "bmd_core.tasks.refresh_company_occupancy": {
+        "queue": MAINTENANCE_QUEUE,
+        "priority": 3,
+    },
+    "bmd_core.tasks.sync_reservations": {
+        "queue": MAINTENANCE_QUEUE,
+        "priority": 3,
+    },
+    "bmd_core.tasks.sync_botmydesk_app_homes": {
+        "queue": MAINTENANCE_QUEUE,
+        "priority": 1,
+    },
+    "bmd_core.tasks.sync_slack_profiles": {
+        "queue": MAINTENANCE_QUEUE,
+        "priority": 1,
+    },
+    "bmd_core.tasks.purge_old_messages": {
+        "queue": MAINTENANCE_QUEUE,
+        "priority": 0,
+    },
+}
+# Prevents workers from reserving lots of (long) tasks, blocking higher priority ones arriving later.
+app.conf.worker_prefetch_multiplier = 1
 app.conf.beat_schedule = {
     "refresh-all-bookmydesk-sessions": {
         "task": "bmd_core.tasks.refresh_all_bookmydesk_sessions",
         "schedule": crontab(hour=0, minute=0),
     },
+    # App homes are updated on changes, so this is just a safety net.
     "sync-botmydesk-app-homes": {
         "task": "bmd_core.tasks.sync_botmydesk_app_homes",
-        "schedule": crontab(hour="*", minute=5),
+        "schedule": crontab(hour="*/6", minute=5),
+    },
+    "sync-botmydesk-app-homes-on-date-rollover": {
+        "task": "bmd_core.tasks.sync_botmydesk_app_homes_on_date_rollover",
+        "schedule": crontab(hour="*", minute="*/15"),
+    },
+    # Profile changes are processed by events, so this is just a safety net.
+    "sync-slack-profiles": {
+        "task": "bmd_core.tasks.sync_slack_profiles",
+        "schedule": crontab(day_of_week=0, hour=4, minute=30),
+    },
+    # Reads sync outdated reservations on the fly as well, so this just keeps them fast.
+    "sync-reservations": {
+        "task": "bmd_core.tasks.sync_reservations",
+        "schedule": crontab(hour="*", minute="*/5"),
+    },
+    # Well within the TTL of the snapshots, so they're always available.
+    "refresh-company-occupancy": {
+        "task": "bmd_core.tasks.refresh_company_occupancy",
+        "schedule": crontab(hour="*", minute="*/10"),
+    },
+    "detect-reservation-changes": {
+        "task": "bmd_core.tasks.detect_reservation_changes",
+        "schedule": crontab(hour="*", minute="*/5"),
     },
     "dispatch-botmydesk-notifications": {
         "task": "bmd_core.tasks.dispatch_botmydesk_notifications",
         "schedule": crontab(hour="*", minute="*/15"),
     },
+    # Only acts once a day per timezone, from the hour configured.
+    "check-out-at-end-of-day": {
+        "task": "bmd_core.tasks.check_out_at_end_of_day",
+        "schedule": crontab(hour="*", minute="*/15"),
+    },
     "purge-old-messages": {
         "task": "bmd_core.tasks.purge_old_messages",
         "schedule": crontab(hour="*", minute="0"),
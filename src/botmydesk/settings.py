@@ -141,6 +141,9 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 """ Python Logging. """
+# Fraction of log records kept for high-frequency paths, e.g. app home events.
+BOTMYDESK_LOG_SAMPLE_RATE = config("BOTMYDESK_LOG_SAMPLE_RATE", cast=float, default=0.1)
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -150,14 +153,22 @@ LOGGING = {
             "style": "{",
         },
         "verbose": {
+            "class": "bmd_core.logging_utils.StructuredFormatter",
             "format": "{asctime} {levelname:8} {module:12} {funcName:30} {lineno:4} | {message}",
             "style": "{",
         },
     },
+    "filters": {
+        "sampling": {
+            "()": "bmd_core.logging_utils.SamplingFilter",
+            "sample_rate": BOTMYDESK_LOG_SAMPLE_RATE,
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
             "formatter": "verbose",
+            "filters": ["sampling"],
         },
     },
     "loggers": {
@@ -197,7 +208,17 @@ SLACK_APP_TOKEN = config(
     "SLACK_APP_TOKEN", cast=str, default=""
 )  # Ony required for Socket Mode.
 SLACK_BOT_TOKEN = config("SLACK_BOT_TOKEN", cast=str)
+# Socket Mode only, see the "socket_mode" command.
+BOTMYDESK_SOCKET_MODE_CONNECTIONS = config(
+    "BOTMYDESK_SOCKET_MODE_CONNECTIONS", cast=int, default=2
+)
+BOTMYDESK_SOCKET_MODE_WORKERS = config(
+    "BOTMYDESK_SOCKET_MODE_WORKERS", cast=int, default=8
+)
+BOTMYDESK_SOCKET_MODE_QUEUE_SIZE = 100
 SLACK_BOT_SIGNING_SECRET = config("SLACK_BOT_SIGNING_SECRET", cast=str)
+# Only override for testing, e.g. when using a fake Slack API.
+SLACK_API_URL = config("SLACK_API_URL", cast=str, default="https://slack.com/api/")
 
 BOOKMYDESK_ACCESS_TOKEN_EXPIRY_MINUTES = config(
     "DEV_BOOKMYDESK_ACCESS_TOKEN_EXPIRY_MINUTES",
@@ -207,6 +228,7 @@ BOOKMYDESK_ACCESS_TOKEN_EXPIRY_MINUTES = config(
 BOOKMYDESK_API_URL = config("BOOKMYDESK_API_URL", cast=str)
 BOOKMYDESK_CLIENT_ID = config("BOOKMYDESK_CLIENT_ID", cast=str)
 BOOKMYDESK_CLIENT_SECRET = config("BOOKMYDESK_CLIENT_SECRET", cast=str)
+BOOKMYDESK_RESERVATIONS_PAGE_SIZE = 50
 
 SLACK_SLASHCOMMAND_BMD = config("SLACK_SLASHCOMMAND_BMD", cast=str)
 
@@ -214,9 +236,77 @@ BOTMYDESK_OWNER_SLACK_ID = config("BOTMYDESK_OWNER_SLACK_ID", cast=str, default=
 BOTMYDESK_WHITELISTED_SLACK_IDS = config(
     "BOTMYDESK_WHITELISTED_SLACK_IDS", cast=Csv(post_process=tuple), default=""
 )
+# Seconds between checks whether the access lists in the database changed. The IDs above are always allowed as well.
+BOTMYDESK_ACCESS_LIST_CHECK_INTERVAL = 5
 BOTMYDESK_WORK_EXTERNALLY_LOCATION_NAME = config(
     "BOTMYDESK_WORK_EXTERNALLY_LOCATION_NAME", cast=str, default=None
 )
+BOTMYDESK_SLACK_USERS_LIST_PAGE_SIZE = 200
+# Seconds the last app home published per user is remembered. Identical renders within this period are not published.
+BOTMYDESK_APP_HOME_HASH_TTL = 24 * 3600
+# Seconds an app home is considered up-to-date after rendering. Opening the app home within this period renders nothing.
+BOTMYDESK_APP_HOME_FRESHNESS_SECONDS = config(
+    "BOTMYDESK_APP_HOME_FRESHNESS_SECONDS", cast=int, default=300
+)
+# Seconds a long-running task holds its lease without a heartbeat, preventing another run from overlapping it.
+BOTMYDESK_TASK_LEASE_TTL = 10 * 60
+BOTMYDESK_TASK_LEASE_HEARTBEAT_INTERVAL = 15
+# Users fetched at once by sweeps over all users, e.g. in background tasks.
+BOTMYDESK_SWEEP_PAGE_SIZE = 200
+# Days of reservations mirrored locally, starting today.
+BOTMYDESK_RESERVATIONS_WINDOW_DAYS = 7
+# Seconds reads accept the local reservations mirror to be outdated, before syncing it on the fly.
+BOTMYDESK_RESERVATIONS_MAX_AGE = config(
+    "BOTMYDESK_RESERVATIONS_MAX_AGE", cast=int, default=15 * 60
+)
+# Seconds after which the background sync refreshes the reservations mirror of a user, ahead of reads.
+BOTMYDESK_RESERVATIONS_SYNC_INTERVAL = 10 * 60
+# Local hours on weekdays (from, until) during which the background sync runs. Reads sync on the fly at any other time.
+BOTMYDESK_RESERVATIONS_SYNC_HOURS = (7, 19)
+# Seconds a company occupancy snapshot (for who's in the office) is considered current. Refreshed in the background well before.
+BOTMYDESK_OCCUPANCY_TTL = 30 * 60
+# Reservations created at once, when booking multiple days.
+BOTMYDESK_BOOKING_CONCURRENCY = 3
+# Local hour from which users still checked in are checked out automatically.
+BOTMYDESK_END_OF_DAY_CHECKOUT_HOUR = config(
+    "BOTMYDESK_END_OF_DAY_CHECKOUT_HOUR", cast=int, default=17
+)
+# Seconds users are re-checked after the end of day checkout started, as the reservations mirror may lag behind.
+BOTMYDESK_END_OF_DAY_CHECKOUT_RECHECK = 30 * 60
+# Users checked out at once at the end of the day, bounded by the rate limit below.
+BOTMYDESK_CHECKOUT_CONCURRENCY = 8
+# BookMyDesk calls per second, at most, made by each run of any background task calling BookMyDesk for many users.
+BOTMYDESK_BOOKMYDESK_RATE_LIMIT = config(
+    "BOTMYDESK_BOOKMYDESK_RATE_LIMIT", cast=float, default=10
+)
+# Users polled at once for reservations expired or cancelled upstream.
+BOTMYDESK_CHANGE_DETECTION_CONCURRENCY = config(
+    "BOTMYDESK_CHANGE_DETECTION_CONCURRENCY", cast=int, default=8
+)
+# Bearer token required for scraping the metrics endpoint. The endpoint is disabled when empty.
+BOTMYDESK_METRICS_TOKEN = config("BOTMYDESK_METRICS_TOKEN", cast=str, default="")
+# Seconds between flushing metrics collected in each process to the database.
+BOTMYDESK_METRICS_FLUSH_INTERVAL = 15
+# Exports traces of webhooks, tasks and upstream calls made by them: "stdout", "file" or empty to disable.
+BOTMYDESK_TRACING_EXPORTER = config("BOTMYDESK_TRACING_EXPORTER", cast=str, default="")
+BOTMYDESK_TRACING_FILE = config(
+    "BOTMYDESK_TRACING_FILE", cast=str, default="/tmp/botmydesk_traces.jsonl"
+)
+# Profiles slash commands and interactivity of these users, and a random fraction (0.0 - 1.0) of everyone else.
+BOTMYDESK_PROFILING_SLACK_USER_IDS = config(
+    "BOTMYDESK_PROFILING_SLACK_USER_IDS", cast=Csv(post_process=tuple), default=""
+)
+BOTMYDESK_PROFILING_SAMPLE_RATE = config(
+    "BOTMYDESK_PROFILING_SAMPLE_RATE", cast=float, default=0.0
+)
+# Only requests profiled taking at least this long have their stacks dumped.
+BOTMYDESK_PROFILING_THRESHOLD_MS = config(
+    "BOTMYDESK_PROFILING_THRESHOLD_MS", cast=int, default=1000
+)
+BOTMYDESK_PROFILING_INTERVAL_MS = 5
+BOTMYDESK_PROFILING_DIRECTORY = config(
+    "BOTMYDESK_PROFILING_DIRECTORY", cast=str, default="/tmp/botmydesk_profiles"
+)
 
 # Sub commands and aliases
 SLACK_SLASHCOMMAND_BMD_DEBUG = "debug"
@@ -234,6 +324,8 @@ SLACK_SLASHCOMMAND_BMD_MARK_CANCELLED = "clear"
 SLACK_SLASHCOMMAND_BMD_MARK_CANCELLED_ALIAS_2 = "cancel"
 SLACK_SLASHCOMMAND_BMD_MARK_CANCELLED_ALIAS_3 = "off"
 SLACK_SLASHCOMMAND_BMD_MARK_CANCELLED_ALIAS_4 = "ziek"
+SLACK_SLASHCOMMAND_BMD_WHO = "who"
+SLACK_SLASHCOMMAND_BMD_WHO_ALIAS_2 = "wie"
 
 # Celery
 # https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html#django-first-steps
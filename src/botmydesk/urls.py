@@ -15,7 +15,10 @@ Including another URLconf
 """
 from django.urls import path, include
 
+from bmd_core.views import MetricsView
+
 
 urlpatterns = [
     path("hooks/", include("bmd_hooks.urls")),
+    path("metrics", MetricsView.as_view()),
 ]